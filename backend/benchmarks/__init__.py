@@ -0,0 +1 @@
+"""Local stand-in upstreams (standin_server) and a load generator (load_generator) for benchmarking"""
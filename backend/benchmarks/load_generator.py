@@ -0,0 +1,209 @@
+"""
+Async load generator for the backend's hot endpoints.
+
+Drives /core/track-task, /core/ping or /tool-calling/execute-stream at a fixed concurrency and
+reports throughput and p50/p95/p99 latency (plus time to first SSE event for streams). Results
+can be saved and later compared against, so each performance change is checked against a baseline.
+
+    python -m benchmarks.load_generator track-task --concurrency 32 --requests 500 --output base.json
+    python -m benchmarks.load_generator track-task --concurrency 32 --requests 500 --baseline base.json
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from PIL import Image, ImageDraw
+
+SCENARIOS = ("track-task", "ping", "execute-stream")
+
+
+def make_screenshot(seed: int, size: tuple = (1280, 800)) -> str:
+    """Draw a screenshot-like PNG; different seeds give frames the dHash cache can't match"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(size[0] - 200), rng.randrange(size[1] - 100)
+        draw.rectangle(
+            (x, y, x + rng.randrange(50, 400), y + rng.randrange(20, 300)),
+            fill=tuple(rng.randrange(256) for _ in range(3)),
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@dataclass
+class Results:
+    latencies_ms: List[float] = field(default_factory=list)
+    first_event_ms: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    def record_error(self, reason: str) -> None:
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        completed = len(self.latencies_ms)
+        summary: Dict[str, Any] = {
+            "completed": completed,
+            "errors": sum(self.errors.values()),
+            "error_breakdown": self.errors,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "throughput_rps": round(completed / self.elapsed_seconds, 2) if self.elapsed_seconds else 0.0,
+        }
+        for name, values in (("latency_ms", self.latencies_ms), ("first_event_ms", self.first_event_ms)):
+            if values:
+                summary[name] = {
+                    "p50": round(percentile(values, 0.50), 1),
+                    "p95": round(percentile(values, 0.95), 1),
+                    "p99": round(percentile(values, 0.99), 1),
+                    "max": round(max(values), 1),
+                }
+        return summary
+
+
+async def _track_task(client: httpx.AsyncClient, index: int, args: argparse.Namespace, results: Results) -> None:
+    response = await client.post("/core/track-task", json={
+        "intent": "Write the quarterly report",
+        "image_base64": args.images[index % len(args.images)],
+        "session_id": f"bench-{index % args.sessions}",
+    })
+    response.raise_for_status()
+
+
+async def _ping(client: httpx.AsyncClient, index: int, args: argparse.Namespace, results: Results) -> None:
+    response = await client.post("/core/ping", json={
+        "context": "You describe screenshots.",
+        "image_base64": args.images[index % len(args.images)],
+    })
+    response.raise_for_status()
+
+
+async def _execute_stream(client: httpx.AsyncClient, index: int, args: argparse.Namespace, results: Results) -> None:
+    started_at = time.perf_counter()
+    first_event = True
+    async with client.stream("POST", "/tool-calling/execute-stream", json={"prompt": args.prompt}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            # "started" is emitted before any upstream call, so it says nothing about model latency
+            if first_event and event.get("type") != "started":
+                results.first_event_ms.append((time.perf_counter() - started_at) * 1000)
+                first_event = False
+            if event.get("type") == "error":
+                raise RuntimeError(event.get("message", "stream error"))
+
+
+_RUNNERS: Dict[str, Callable[..., Any]] = {
+    "track-task": _track_task,
+    "ping": _ping,
+    "execute-stream": _execute_stream,
+}
+
+
+async def run(args: argparse.Namespace) -> Results:
+    results = Results()
+    runner = _RUNNERS[args.scenario]
+    next_index = 0
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for index in range(args.warmup):
+            try:
+                await runner(client, index, args, Results())
+            except Exception:
+                pass
+
+        async def worker() -> None:
+            nonlocal next_index
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if deadline is None and next_index >= args.requests:
+                    return
+                index = next_index
+                next_index += 1
+
+                started_at = time.perf_counter()
+                try:
+                    await runner(client, index, args, results)
+                except httpx.HTTPStatusError as e:
+                    results.record_error(f"http_{e.response.status_code}")
+                    continue
+                except Exception as e:
+                    results.record_error(type(e).__name__)
+                    continue
+                results.latencies_ms.append((time.perf_counter() - started_at) * 1000)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        results.elapsed_seconds = time.perf_counter() - started_at
+    return results
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change against a saved run; negative latency and positive throughput deltas are wins"""
+    def change(current: float, previous: float) -> Optional[float]:
+        return round((current - previous) / previous * 100, 1) if previous else None
+
+    deltas: Dict[str, Any] = {"throughput_rps_pct": change(summary["throughput_rps"], baseline["throughput_rps"])}
+    for name in ("latency_ms", "first_event_ms"):
+        if name in summary and name in baseline:
+            deltas[f"{name}_pct"] = {
+                key: change(summary[name][key], baseline[name][key]) for key in ("p50", "p95", "p99")
+            }
+    return deltas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the backend's hot endpoints")
+    parser.add_argument("scenario", choices=SCENARIOS)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Total requests, unless --duration is set")
+    parser.add_argument("--duration", type=float, default=None, help="Run for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests sent first")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--unique-images", type=int, default=1,
+                        help="Distinct screenshots to rotate through; 1 lets the server's caches hit")
+    parser.add_argument("--sessions", type=int, default=8, help="Distinct session_ids for track-task")
+    parser.add_argument("--prompt", default="List the open GitHub issues and summarize them")
+    parser.add_argument("--output", help="Write the summary as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a summary previously written with --output")
+    args = parser.parse_args()
+
+    args.images = [make_screenshot(seed) for seed in range(max(1, args.unique_images))]
+    summary = asyncio.run(run(args)).summary()
+    summary["scenario"] = args.scenario
+    summary["concurrency"] = args.concurrency
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            summary["vs_baseline"] = compare(summary, json.load(f))
+    print(json.dumps(summary, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
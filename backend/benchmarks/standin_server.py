@@ -0,0 +1,467 @@
+"""
+Local stand-in for the upstream APIs the backend calls, so load tests don't spend real quota.
+
+Emulates OpenAI chat completions (plain, JSON-schema, tool calls and streaming) and the streaming
+Responses API, the Gmail/Docs/Drive endpoints the tool registry uses (including uploads and batch
+requests), and the GitHub issues API with ETags. Each upstream gets its own log-normal latency and
+error rate.
+
+    python -m benchmarks.standin_server --port 9100 --openai-latency-ms 800 --openai-error-rate 0.01
+
+Point the backend at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_KEY=stand-in
+    GOOGLE_API_ROOT_URL=http://127.0.0.1:9100/
+    GITHUB_API_URL=http://127.0.0.1:9100 GITHUB_TOKEN=stand-in GITHUB_REPOSITORY=bench/repo
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+
+@dataclass
+class LatencyProfile:
+    median_ms: float
+    sigma: float
+    error_rate: float
+
+    def sample_seconds(self) -> float:
+        return self.median_ms * math.exp(random.gauss(0.0, self.sigma)) / 1000
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+
+PROFILES: Dict[str, LatencyProfile] = {
+    "openai": LatencyProfile(median_ms=800, sigma=0.4, error_rate=0.0),
+    "google": LatencyProfile(median_ms=150, sigma=0.3, error_rate=0.0),
+    "github": LatencyProfile(median_ms=100, sigma=0.3, error_rate=0.0),
+}
+
+# Share of an OpenAI call's latency spent before the first streamed token
+FIRST_TOKEN_SHARE = 0.3
+OFF_TRACK_RATE = 0.3
+DOC_PARAGRAPHS = 20
+
+app = FastAPI()
+
+
+def _injected_error(upstream: str) -> Optional[Response]:
+    if not PROFILES[upstream].should_fail():
+        return None
+    if random.random() < 0.5:
+        return JSONResponse(
+            {"error": {"message": "Stand-in rate limit", "type": "rate_limit_error"}},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    return JSONResponse({"error": {"message": "Stand-in server error", "type": "server_error"}}, status_code=503)
+
+
+def _estimate_tokens(value: Any) -> int:
+    return max(1, len(json.dumps(value)) // 4)
+
+
+def _placeholder_value(schema: Dict[str, Any]) -> Any:
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        return [_placeholder_value(schema.get("items", {"type": "string"}))]
+    return "benchmark"
+
+
+def _tool_call_for(tools: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """Pick a read-only looking tool and fill its required parameters with placeholders"""
+    functions = [tool.get("function", tool) for tool in tools]
+    chosen = next((f for f in functions if f["name"].startswith(("get_", "read_", "search_"))), functions[0])
+    parameters = chosen.get("parameters", {})
+    properties = parameters.get("properties", {})
+    arguments = {name: _placeholder_value(properties.get(name, {})) for name in parameters.get("required", [])}
+    return chosen["name"], json.dumps(arguments)
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _plan_reply(
+    last_role: str,
+    last_text: str,
+    tools: List[Dict[str, Any]],
+    response_format: Optional[Dict[str, Any]],
+) -> Tuple[Optional[str], Optional[Tuple[str, str]]]:
+    """Decide between a text reply and a tool call the way a real model plausibly would"""
+    if response_format and response_format.get("type") == "json_schema":
+        status = "off_track" if random.random() < OFF_TRACK_RATE else "on_track"
+        return json.dumps({"status": status, "confidence": 0.9, "reasoning": "Stand-in analysis"}), None
+    if tools and last_role == "user":
+        return None, _tool_call_for(tools)
+    if last_role == "tool":
+        return "All done, here is what the tools returned.", None
+    array_request = re.search(r"JSON array of (\d+)", last_text)
+    if array_request:
+        count = int(array_request.group(1))
+        return json.dumps([f"Stand-in nudge {index} - back to it!" for index in range(count)]), None
+    return "This is a stand-in response from the local benchmark server.", None
+
+
+def _chunk(completion_id: str, model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+    return "data: " + json.dumps({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }) + "\n\n"
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\S+\s*", text) or [text]
+
+
+async def _stream_chat_completion(
+    body: Dict[str, Any],
+    content: Optional[str],
+    tool_call: Optional[Tuple[str, str]],
+    usage: Dict[str, Any],
+    latency: float,
+) -> AsyncIterator[str]:
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    model = body.get("model", "stand-in")
+    await asyncio.sleep(latency * FIRST_TOKEN_SHARE)
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+
+    if tool_call is not None:
+        name, arguments = tool_call
+        yield _chunk(completion_id, model, {"tool_calls": [{
+            "index": 0, "id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+            "function": {"name": name, "arguments": ""},
+        }]})
+        yield _chunk(completion_id, model, {"tool_calls": [{"index": 0, "function": {"arguments": arguments}}]})
+        finish_reason = "tool_calls"
+    else:
+        pieces = _words(content or "")
+        delay = latency * (1 - FIRST_TOKEN_SHARE) / len(pieces)
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield _chunk(completion_id, model, {"content": piece})
+        finish_reason = "stop"
+
+    yield _chunk(completion_id, model, {}, finish_reason)
+    if (body.get("stream_options") or {}).get("include_usage"):
+        yield "data: " + json.dumps({
+            "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": model, "choices": [], "usage": usage,
+        }) + "\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> Response:
+    error = _injected_error("openai")
+    if error is not None:
+        return error
+
+    body = await request.json()
+    messages = body.get("messages", [])
+    last = messages[-1] if messages else {"role": "user"}
+    content, tool_call = _plan_reply(
+        last.get("role", "user"), _message_text(last), body.get("tools") or [], body.get("response_format")
+    )
+    prompt_tokens = _estimate_tokens(messages) + _estimate_tokens(body.get("tools") or [])
+    completion_tokens = _estimate_tokens(content or tool_call)
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+    latency = PROFILES["openai"].sample_seconds()
+
+    if body.get("stream"):
+        return StreamingResponse(
+            _stream_chat_completion(body, content, tool_call, usage, latency), media_type="text/event-stream"
+        )
+
+    await asyncio.sleep(latency)
+    message: Dict[str, Any] = {"role": "assistant", "content": content}
+    if tool_call is not None:
+        message["tool_calls"] = [{
+            "id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+            "function": {"name": tool_call[0], "arguments": tool_call[1]},
+        }]
+    return JSONResponse({
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stand-in"),
+        "choices": [{
+            "index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop",
+        }],
+        "usage": usage,
+    })
+
+
+def _event(sequence: List[int], payload: Dict[str, Any]) -> str:
+    sequence[0] += 1
+    payload["sequence_number"] = sequence[0]
+    return f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def _stream_response(body: Dict[str, Any], latency: float) -> AsyncIterator[str]:
+    response_id = f"resp_{uuid.uuid4().hex}"
+    items = body.get("input") or []
+    if isinstance(items, str):
+        items = [{"role": "user", "content": items}]
+    last = items[-1] if items else {"role": "user"}
+    last_role = "tool" if last.get("type") == "function_call_output" else last.get("role", "user")
+    content, tool_call = _plan_reply(last_role, _message_text(last), body.get("tools") or [], None)
+
+    sequence = [0]
+    response: Dict[str, Any] = {
+        "id": response_id, "object": "response", "created_at": int(time.time()),
+        "model": body.get("model", "stand-in"), "status": "in_progress", "output": [],
+        "previous_response_id": body.get("previous_response_id"),
+    }
+    yield _event(sequence, {"type": "response.created", "response": response})
+    await asyncio.sleep(latency * FIRST_TOKEN_SHARE)
+
+    if tool_call is not None:
+        item = {
+            "type": "function_call", "id": f"fc_{uuid.uuid4().hex}", "call_id": f"call_{uuid.uuid4().hex[:24]}",
+            "name": tool_call[0], "arguments": tool_call[1], "status": "completed",
+        }
+    else:
+        pieces = _words(content or "")
+        delay = latency * (1 - FIRST_TOKEN_SHARE) / len(pieces)
+        item_id = f"msg_{uuid.uuid4().hex}"
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield _event(sequence, {
+                "type": "response.output_text.delta", "item_id": item_id,
+                "output_index": 0, "content_index": 0, "delta": piece,
+            })
+        item = {
+            "type": "message", "id": item_id, "role": "assistant", "status": "completed",
+            "content": [{"type": "output_text", "text": content, "annotations": []}],
+        }
+    yield _event(sequence, {"type": "response.output_item.done", "output_index": 0, "item": item})
+
+    input_tokens = _estimate_tokens(items) + _estimate_tokens(body.get("tools") or [])
+    output_tokens = _estimate_tokens(item)
+    response.update({
+        "status": "completed",
+        "output": [item],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    })
+    yield _event(sequence, {"type": "response.completed", "response": response})
+
+
+@app.post("/v1/responses")
+async def responses(request: Request) -> Response:
+    error = _injected_error("openai")
+    if error is not None:
+        return error
+    body = await request.json()
+    return StreamingResponse(
+        _stream_response(body, PROFILES["openai"].sample_seconds()), media_type="text/event-stream"
+    )
+
+
+def _issues(state: str, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "number": number,
+            "title": f"Stand-in issue {number}",
+            "state": state,
+            "html_url": f"https://github.com/bench/repo/issues/{number}",
+            "body": "Generated by the benchmark stand-in server. " * 20,
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+@app.get("/repos/{owner}/{repo}/issues")
+async def list_issues(owner: str, repo: str, request: Request, state: str = "open", per_page: int = 30) -> Response:
+    error = _injected_error("github")
+    if error is not None:
+        return error
+    await asyncio.sleep(PROFILES["github"].sample_seconds())
+
+    issues = _issues(state, per_page)
+    etag = '"' + hashlib.sha1(json.dumps(issues).encode("utf-8")).hexdigest() + '"'
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(issues, headers={"ETag": etag})
+
+
+@app.post("/repos/{owner}/{repo}/issues")
+async def create_issue(owner: str, repo: str, request: Request) -> Response:
+    error = _injected_error("github")
+    if error is not None:
+        return error
+    await asyncio.sleep(PROFILES["github"].sample_seconds())
+
+    body = await request.json()
+    number = random.randint(1000, 9999)
+    return JSONResponse(
+        {
+            "number": number,
+            "title": body.get("title", ""),
+            "state": "open",
+            "html_url": f"https://github.com/{owner}/{repo}/issues/{number}",
+        },
+        status_code=201,
+    )
+
+
+def _drive_file(file_id: str, name: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": file_id,
+        "name": name or f"Stand-in doc {file_id[:6]}",
+        "version": "1",
+        "modifiedTime": "2024-01-01T00:00:00.000Z",
+        "webViewLink": f"https://docs.google.com/document/d/{file_id}/edit",
+    }
+
+
+def _document(doc_id: str) -> Dict[str, Any]:
+    paragraphs = [
+        {"paragraph": {"elements": [{"textRun": {"content": f"Paragraph {index} of the stand-in document.\n"}}]}}
+        for index in range(DOC_PARAGRAPHS)
+    ]
+    return {"documentId": doc_id, "title": f"Stand-in doc {doc_id[:6]}", "body": {"content": paragraphs}}
+
+
+def _new_doc_id() -> str:
+    return uuid.uuid4().hex + uuid.uuid4().hex[:12]
+
+
+_GOOGLE_ROUTES = [
+    ("POST", re.compile(r"/gmail/v1/users/[^/]+/messages/send"),
+     lambda match: {"id": uuid.uuid4().hex[:16], "threadId": uuid.uuid4().hex[:16], "labelIds": ["SENT"]}),
+    ("POST", re.compile(r"/v1/documents"),
+     lambda match: {"documentId": _new_doc_id(), "title": "Untitled"}),
+    ("GET", re.compile(r"/v1/documents/([^/:]+)"), lambda match: _document(match.group(1))),
+    ("POST", re.compile(r"/v1/documents/([^/:]+):batchUpdate"),
+     lambda match: {"documentId": match.group(1), "replies": [{}]}),
+    ("GET", re.compile(r"/drive/v3/files"),
+     lambda match: {"files": [_drive_file(_new_doc_id(), f"Stand-in doc {index}") for index in range(3)]}),
+    ("GET", re.compile(r"/drive/v3/files/([^/]+)"), lambda match: _drive_file(match.group(1))),
+    ("POST", re.compile(r"/upload/drive/v3/files"), lambda match: _drive_file(_new_doc_id())),
+]
+
+
+def _google_dispatch(method: str, path: str) -> Tuple[int, Dict[str, Any]]:
+    for route_method, pattern, handler in _GOOGLE_ROUTES:
+        match = pattern.fullmatch(path)
+        if route_method == method and match:
+            return 200, handler(match)
+    return 404, {"error": {"code": 404, "message": f"Stand-in has no route for {method} {path}"}}
+
+
+def _google_error() -> Optional[Response]:
+    if not PROFILES["google"].should_fail():
+        return None
+    return JSONResponse({"error": {"code": 503, "message": "Stand-in backend error"}}, status_code=503)
+
+
+@app.post("/batch")
+@app.post("/batch/{api}/{version}")
+async def google_batch(request: Request) -> Response:
+    """Answer a multipart/mixed batch by dispatching each embedded request"""
+    error = _google_error()
+    if error is not None:
+        return error
+    await asyncio.sleep(PROFILES["google"].sample_seconds())
+
+    raw = await request.body()
+    content_type = request.headers["content-type"]
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + raw)
+
+    boundary = f"batch_{uuid.uuid4().hex}"
+    parts: List[str] = []
+    for part in message.iter_parts():
+        request_line = part.get_payload(decode=True).decode("utf-8").splitlines()[0]
+        method, target, _ = request_line.split(" ", 2)
+        status, payload = _google_dispatch(method, target.split("?", 1)[0])
+        content_id = part["Content-ID"].strip("<>")
+        parts.append(
+            f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+            f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(payload)}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return Response("".join(parts), media_type=f"multipart/mixed; boundary={boundary}")
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST"])
+async def google_api(path: str, request: Request) -> Response:
+    error = _google_error()
+    if error is not None:
+        return error
+    await asyncio.sleep(PROFILES["google"].sample_seconds())
+
+    status, payload = _google_dispatch(request.method, "/" + path)
+    return JSONResponse(payload, status_code=status)
+
+
+def main() -> None:
+    global OFF_TRACK_RATE
+    parser = argparse.ArgumentParser(description="Local stand-in for OpenAI, Google and GitHub APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for upstream, profile in PROFILES.items():
+        parser.add_argument(f"--{upstream}-latency-ms", type=float, default=profile.median_ms,
+                            help=f"Median {upstream} latency")
+        parser.add_argument(f"--{upstream}-latency-sigma", type=float, default=profile.sigma,
+                            help=f"Log-normal spread of {upstream} latency")
+        parser.add_argument(f"--{upstream}-error-rate", type=float, default=profile.error_rate,
+                            help=f"Fraction of {upstream} calls answered with 429/503")
+    parser.add_argument("--off-track-rate", type=float, default=OFF_TRACK_RATE,
+                        help="Fraction of task analyses that come back off_track")
+    args = parser.parse_args()
+
+    OFF_TRACK_RATE = args.off_track_rate
+    for upstream in PROFILES:
+        PROFILES[upstream] = LatencyProfile(
+            median_ms=getattr(args, f"{upstream}_latency_ms"),
+            sigma=getattr(args, f"{upstream}_latency_sigma"),
+            error_rate=getattr(args, f"{upstream}_error_rate"),
+        )
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,55 @@ class Config:
         self.GITHUB_APP_ID: Optional[str] = os.getenv("GITHUB_APP_ID")
         self.GITHUB_APP_PRIVATE_KEY: Optional[str] = os.getenv("GITHUB_APP_PRIVATE_KEY")
         self.GITHUB_REPOSITORY: Optional[str] = os.getenv("GITHUB_REPOSITORY")
+        self.GITHUB_API_URL: str = os.getenv("GITHUB_API_URL", "https://api.github.com")
+        self.GITHUB_TIMEOUT_SECONDS: float = float(os.getenv("GITHUB_TIMEOUT_SECONDS", "10"))
+        self.GITHUB_MAX_CONNECTIONS: int = int(os.getenv("GITHUB_MAX_CONNECTIONS", "10"))
+        self.GITHUB_ETAG_CACHE_SIZE: int = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "256"))
+        self.GOOGLE_TOKEN_PATH: str = os.getenv("GOOGLE_TOKEN_PATH", "token.pickle")
+        self.GOOGLE_TIMEOUT_SECONDS: float = float(os.getenv("GOOGLE_TIMEOUT_SECONDS", "20"))
+        self.GOOGLE_API_ROOT_URL: Optional[str] = os.getenv("GOOGLE_API_ROOT_URL")
+        self.GOOGLE_PREWARM: bool = os.getenv("GOOGLE_PREWARM", "true").lower() == "true"
+        self.GOOGLE_DOC_CACHE_SIZE: int = int(os.getenv("GOOGLE_DOC_CACHE_SIZE", "64"))
+        self.SCREENSHOT_CACHE_MAX_DISTANCE: int = int(os.getenv("SCREENSHOT_CACHE_MAX_DISTANCE", "4"))
+        self.SCREENSHOT_CACHE_TTL_SECONDS: float = float(os.getenv("SCREENSHOT_CACHE_TTL_SECONDS", "120"))
+        self.SCREENSHOT_CACHE_ENTRIES_PER_SESSION: int = int(os.getenv("SCREENSHOT_CACHE_ENTRIES_PER_SESSION", "8"))
+        self.IMAGE_MAX_EDGE: int = int(os.getenv("IMAGE_MAX_EDGE", "1568"))
+        self.IMAGE_OUTPUT_FORMAT: str = os.getenv("IMAGE_OUTPUT_FORMAT", "jpeg").lower()
+        self.IMAGE_QUALITY: int = int(os.getenv("IMAGE_QUALITY", "80"))
+        self.IMAGE_LOW_DETAIL_MAX_EDGE: int = int(os.getenv("IMAGE_LOW_DETAIL_MAX_EDGE", "512"))
+        self.IMAGE_PROCESSING_WORKERS: int = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+        self.NUDGE_POLICY: str = os.getenv("NUDGE_POLICY", "adaptive").lower()
+        self.NUDGE_ADAPTIVE_THRESHOLD: float = float(os.getenv("NUDGE_ADAPTIVE_THRESHOLD", "0.3"))
+        self.NUDGE_ADAPTIVE_WINDOW: int = int(os.getenv("NUDGE_ADAPTIVE_WINDOW", "20"))
+        self.NUDGE_POOL_SIZE: int = int(os.getenv("NUDGE_POOL_SIZE", "8"))
+        self.NUDGE_POOL_MAX_INTENTS: int = int(os.getenv("NUDGE_POOL_MAX_INTENTS", "128"))
+        self.NUDGE_POOL_FAILURE_BACKOFF_SECONDS: float = float(os.getenv("NUDGE_POOL_FAILURE_BACKOFF_SECONDS", "30"))
+        self.RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+        self.RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.25"))
+        self.RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8"))
+        self.RETRY_BUDGET_RATIO: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+        self.RETRY_BUDGET_MIN_PER_SECOND: float = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1"))
+        self.OPENAI_REQUEST_DEADLINE_SECONDS: float = float(os.getenv("OPENAI_REQUEST_DEADLINE_SECONDS", "60"))
+        self.OPENAI_HEDGE_TRACK_TASK: bool = os.getenv("OPENAI_HEDGE_TRACK_TASK", "false").lower() == "true"
+        self.OPENAI_HEDGE_PERCENTILE: float = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "0.9"))
+        self.OPENAI_HEDGE_DELAY_SECONDS: float = float(os.getenv("OPENAI_HEDGE_DELAY_SECONDS", "3"))
+        self.OPENAI_HEDGE_MAX_RATE: float = float(os.getenv("OPENAI_HEDGE_MAX_RATE", "0.1"))
+        self.TRACK_TASK_BATCH_MAX_ITEMS: int = int(os.getenv("TRACK_TASK_BATCH_MAX_ITEMS", "64"))
+        self.TRACK_TASK_BATCH_CONCURRENCY: int = int(os.getenv("TRACK_TASK_BATCH_CONCURRENCY", "8"))
+        self.TOOL_EXECUTOR_WORKERS: int = int(os.getenv("TOOL_EXECUTOR_WORKERS", "8"))
+        self.TOOL_DEFAULT_TIMEOUT_SECONDS: float = float(os.getenv("TOOL_DEFAULT_TIMEOUT_SECONDS", "30"))
+        self.TOOL_CALL_CONCURRENCY: int = int(os.getenv("TOOL_CALL_CONCURRENCY", "4"))
+        self.CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "32000"))
+        self.CONTEXT_TOOL_EXCERPT_CHARS: int = int(os.getenv("CONTEXT_TOOL_EXCERPT_CHARS", "600"))
+        self.SESSION_STORE_BACKEND: str = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+        self.SESSION_STORE_PATH: str = os.getenv("SESSION_STORE_PATH", "session_store.sqlite3")
+        self.SESSION_STORE_CACHE_TTL_SECONDS: float = float(os.getenv("SESSION_STORE_CACHE_TTL_SECONDS", "1"))
+        self.SESSION_STORE_CACHE_SIZE: int = int(os.getenv("SESSION_STORE_CACHE_SIZE", "1024"))
+        self.SESSION_STORE_MAX_KEYS: int = int(os.getenv("SESSION_STORE_MAX_KEYS", "4096"))
+        self.CONVERSATION_MAX_TURNS: int = int(os.getenv("CONVERSATION_MAX_TURNS", "20"))
+        self.CONVERSATION_TTL_SECONDS: float = float(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+        self.TOOL_CALLING_RESPONSES_API: bool = os.getenv("TOOL_CALLING_RESPONSES_API", "false").lower() == "true"
+        self.MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
 
     def validate_required_config(self) -> None:
         missing = []
@@ -22,6 +71,15 @@ class Config:
         if not self.OPENAI_KEY:
             missing.append("OPENAI_KEY")
 
+        if self.IMAGE_OUTPUT_FORMAT not in ("jpeg", "webp"):
+            raise ValueError(f"IMAGE_OUTPUT_FORMAT must be 'jpeg' or 'webp', got '{self.IMAGE_OUTPUT_FORMAT}'")
+
+        if self.NUDGE_POLICY not in ("speculative", "lazy", "adaptive"):
+            raise ValueError(f"NUDGE_POLICY must be 'speculative', 'lazy' or 'adaptive', got '{self.NUDGE_POLICY}'")
+
+        if self.SESSION_STORE_BACKEND not in ("memory", "sqlite"):
+            raise ValueError(f"SESSION_STORE_BACKEND must be 'memory' or 'sqlite', got '{self.SESSION_STORE_BACKEND}'")
+
         if missing:
             raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
 
@@ -33,4 +91,53 @@ OPENAI_KEY = config.OPENAI_KEY
 GITHUB_TOKEN = config.GITHUB_TOKEN
 GITHUB_APP_ID = config.GITHUB_APP_ID
 GITHUB_APP_PRIVATE_KEY = config.GITHUB_APP_PRIVATE_KEY
-GITHUB_REPOSITORY = config.GITHUB_REPOSITORY
\ No newline at end of file
+GITHUB_REPOSITORY = config.GITHUB_REPOSITORY
+GITHUB_API_URL = config.GITHUB_API_URL
+GITHUB_TIMEOUT_SECONDS = config.GITHUB_TIMEOUT_SECONDS
+GITHUB_MAX_CONNECTIONS = config.GITHUB_MAX_CONNECTIONS
+GITHUB_ETAG_CACHE_SIZE = config.GITHUB_ETAG_CACHE_SIZE
+GOOGLE_TOKEN_PATH = config.GOOGLE_TOKEN_PATH
+GOOGLE_TIMEOUT_SECONDS = config.GOOGLE_TIMEOUT_SECONDS
+GOOGLE_API_ROOT_URL = config.GOOGLE_API_ROOT_URL
+GOOGLE_PREWARM = config.GOOGLE_PREWARM
+GOOGLE_DOC_CACHE_SIZE = config.GOOGLE_DOC_CACHE_SIZE
+SCREENSHOT_CACHE_MAX_DISTANCE = config.SCREENSHOT_CACHE_MAX_DISTANCE
+SCREENSHOT_CACHE_TTL_SECONDS = config.SCREENSHOT_CACHE_TTL_SECONDS
+SCREENSHOT_CACHE_ENTRIES_PER_SESSION = config.SCREENSHOT_CACHE_ENTRIES_PER_SESSION
+IMAGE_MAX_EDGE = config.IMAGE_MAX_EDGE
+IMAGE_OUTPUT_FORMAT = config.IMAGE_OUTPUT_FORMAT
+IMAGE_QUALITY = config.IMAGE_QUALITY
+IMAGE_LOW_DETAIL_MAX_EDGE = config.IMAGE_LOW_DETAIL_MAX_EDGE
+IMAGE_PROCESSING_WORKERS = config.IMAGE_PROCESSING_WORKERS
+MAX_UPLOAD_BYTES = config.MAX_UPLOAD_BYTES
+TOOL_EXECUTOR_WORKERS = config.TOOL_EXECUTOR_WORKERS
+TOOL_CALL_CONCURRENCY = config.TOOL_CALL_CONCURRENCY
+NUDGE_POLICY = config.NUDGE_POLICY
+NUDGE_ADAPTIVE_THRESHOLD = config.NUDGE_ADAPTIVE_THRESHOLD
+NUDGE_ADAPTIVE_WINDOW = config.NUDGE_ADAPTIVE_WINDOW
+NUDGE_POOL_SIZE = config.NUDGE_POOL_SIZE
+NUDGE_POOL_MAX_INTENTS = config.NUDGE_POOL_MAX_INTENTS
+NUDGE_POOL_FAILURE_BACKOFF_SECONDS = config.NUDGE_POOL_FAILURE_BACKOFF_SECONDS
+CONTEXT_TOKEN_BUDGET = config.CONTEXT_TOKEN_BUDGET
+CONTEXT_TOOL_EXCERPT_CHARS = config.CONTEXT_TOOL_EXCERPT_CHARS
+TOOL_DEFAULT_TIMEOUT_SECONDS = config.TOOL_DEFAULT_TIMEOUT_SECONDS
+RETRY_MAX_ATTEMPTS = config.RETRY_MAX_ATTEMPTS
+RETRY_BASE_DELAY_SECONDS = config.RETRY_BASE_DELAY_SECONDS
+RETRY_MAX_DELAY_SECONDS = config.RETRY_MAX_DELAY_SECONDS
+RETRY_BUDGET_RATIO = config.RETRY_BUDGET_RATIO
+RETRY_BUDGET_MIN_PER_SECOND = config.RETRY_BUDGET_MIN_PER_SECOND
+OPENAI_REQUEST_DEADLINE_SECONDS = config.OPENAI_REQUEST_DEADLINE_SECONDS
+OPENAI_HEDGE_TRACK_TASK = config.OPENAI_HEDGE_TRACK_TASK
+OPENAI_HEDGE_PERCENTILE = config.OPENAI_HEDGE_PERCENTILE
+OPENAI_HEDGE_DELAY_SECONDS = config.OPENAI_HEDGE_DELAY_SECONDS
+OPENAI_HEDGE_MAX_RATE = config.OPENAI_HEDGE_MAX_RATE
+TRACK_TASK_BATCH_MAX_ITEMS = config.TRACK_TASK_BATCH_MAX_ITEMS
+TRACK_TASK_BATCH_CONCURRENCY = config.TRACK_TASK_BATCH_CONCURRENCY
+SESSION_STORE_BACKEND = config.SESSION_STORE_BACKEND
+SESSION_STORE_PATH = config.SESSION_STORE_PATH
+SESSION_STORE_CACHE_TTL_SECONDS = config.SESSION_STORE_CACHE_TTL_SECONDS
+SESSION_STORE_CACHE_SIZE = config.SESSION_STORE_CACHE_SIZE
+SESSION_STORE_MAX_KEYS = config.SESSION_STORE_MAX_KEYS
+CONVERSATION_MAX_TURNS = config.CONVERSATION_MAX_TURNS
+CONVERSATION_TTL_SECONDS = config.CONVERSATION_TTL_SECONDS
+TOOL_CALLING_RESPONSES_API = config.TOOL_CALLING_RESPONSES_API
\ No newline at end of file
@@ -1,9 +1,19 @@
+import itertools
 import random
 from typing import List
 
 
 class TaskTrackingPrompts:
-    
+    OFF_TRACK_NUDGES: List[str] = [
+        "Hey, let's get back to it! 💪",
+        "Quick detour? Time to refocus 🎯",
+        "You've got this, back to the task! 🚀",
+        "Little break's over, let's go! ⚡",
+        "Eyes back on the prize 👀✨",
+        "Future you says thanks for refocusing 🙌",
+    ]
+    # next() on itertools.count is atomic, so concurrent callers never share an index
+    _nudge_counter = itertools.count(random.randrange(len(OFF_TRACK_NUDGES)))
 
     @staticmethod
     def get_task_analysis_system_prompt() -> str:
@@ -48,16 +58,7 @@ CRITICAL: Respond ONLY with the JSON object. No additional text, explanations, o
 
     @classmethod
     def get_off_track_nudge(cls) -> str:
-        if len(cls._used_nudge_indices) >= len(cls.OFF_TRACK_NUDGES):
-            cls._used_nudge_indices.clear()
-        
-        available_indices = [i for i in range(len(cls.OFF_TRACK_NUDGES)) if i not in cls._used_nudge_indices]
-        
-        chosen_index = random.choice(available_indices)
-        
-        cls._used_nudge_indices.add(chosen_index)
-
-        return cls.OFF_TRACK_NUDGES[chosen_index]
+        return cls.OFF_TRACK_NUDGES[next(cls._nudge_counter) % len(cls.OFF_TRACK_NUDGES)]
 
     @staticmethod
     def get_nudge_generation_prompt(intent: str, agent_personality: str) -> str:
@@ -74,3 +75,29 @@ The nudge should:
 - Sound natural and conversational
 
 Generate ONE nudge message that sounds like you and will get them to get back on track with "{intent}"."""
+
+    @staticmethod
+    def get_nudge_batch_generation_prompt(intent: str, agent_personality: str, count: int) -> str:
+        """Generate prompt for creating several distinct personalized off-track nudges in one call"""
+        return f"""Based on your personality: "{agent_personality}"
+
+Generate {count} different playful, encouraging nudge messages for someone who got distracted from their task: "{intent}".
+
+Each nudge should:
+- Match your personality and speaking style exactly
+- Reference their specific intent: "{intent}"
+- Limit to 1 sentence (10 words or less)
+- Include relevant emojis that fit your vibe
+- Sound natural and conversational
+- Be clearly different from the others in wording
+
+Respond ONLY with a JSON array of {count} strings. No additional text, explanations, or formatting."""
+
+
+class ToolCallingPrompts:
+    # Kept byte-identical across requests so the provider's prompt prefix cache can hit
+    SYSTEM_PROMPT = "You are a helpful assistant that can manage emails, Github, and Google Docs. When given multi-step tasks, execute them step by step using available tools. Always complete the entire requested task."
+
+    @classmethod
+    def get_system_prompt(cls) -> str:
+        return cls.SYSTEM_PROMPT
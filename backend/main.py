@@ -1,10 +1,26 @@
+import asyncio
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from config import GOOGLE_PREWARM, config
 from routes.core import core_router
 from routes.native_tool_calling import native_tool_calling_router
-from config import config
+from services.github_client_service import service as github_client_service
+from services.google_doc_cache_service import service as google_doc_cache_service
+from services.hedging_service import service as hedging_service
+from services.image_processing_service import service as image_processing_service
+from services.metrics_service import MetricsMiddleware, service as metrics_service
+from services.nudge_pool_service import service as nudge_pool_service
+from services.prompt_cache_stats_service import service as prompt_cache_stats_service
+from services.retry_service import service as retry_service
+from services.screenshot_cache_service import service as screenshot_cache_service
+from services.session_store_service import service as session_store_service
+from services.single_flight_service import service as single_flight_service
+from services.task_tracking_service import service as task_tracking_service
+from services.tool_registry_service import service as tool_registry_service
 
 app = FastAPI()
 
@@ -23,18 +39,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps everything, CORS included
+app.add_middleware(MetricsMiddleware)
+
 # register routers
 app.include_router(core_router, prefix="/core")
 app.include_router(native_tool_calling_router, prefix="/tool-calling")
 
+# Service counters are exported alongside the latency metrics on /metrics
+for component, get_stats in (
+    ("coalescing", single_flight_service.get_stats),
+    ("github_client", github_client_service.get_stats),
+    ("google_doc_cache", google_doc_cache_service.get_stats),
+    ("hedging", hedging_service.get_stats),
+    ("image_processing", image_processing_service.get_stats),
+    ("nudge_policy", task_tracking_service.get_nudge_stats),
+    ("nudge_pool", nudge_pool_service.get_stats),
+    ("prompt_cache", prompt_cache_stats_service.get_stats),
+    ("retry", retry_service.get_stats),
+    ("screenshot_cache", screenshot_cache_service.get_stats),
+    ("session_store", session_store_service.get_stats),
+):
+    metrics_service.register_stats(component, get_stats)
+
+
 @app.get("/")
 def read_root() -> dict:
     return {"Hello": "World"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """Prometheus text exposition of latency metrics and every service's get_stats counters"""
+    return PlainTextResponse(metrics_service.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 async def startup_event() -> None:
     load_dotenv()
     config.validate_required_config()
+    if GOOGLE_PREWARM:
+        # Warm in the background so startup isn't blocked on discovery parsing
+        app.state.google_prewarm_task = asyncio.create_task(tool_registry_service.prewarm_async())
     print("Application startup")
 
 app.add_event_handler("startup", startup_event)
+
+
+async def shutdown_event() -> None:
+    await github_client_service.aclose()
+
+app.add_event_handler("shutdown", shutdown_event)
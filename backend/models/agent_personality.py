@@ -1,8 +1,11 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
 class AgentPersonalityRequest(BaseModel):
     personality_description: str
+    session_id: Optional[str] = None
 
 
 class AgentPersonalityResponse(BaseModel):
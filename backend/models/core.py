@@ -1,6 +1,8 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+
+from config import TRACK_TASK_BATCH_MAX_ITEMS
 
 
 class PingMessage(BaseModel):
@@ -21,6 +23,16 @@ class PingResponse(BaseModel):
 class TaskTrackingRequest(BaseModel):
     intent: str
     image_base64: str
+    session_id: Optional[str] = None
+
+
+class TaskTrackingBatchItem(TaskTrackingRequest):
+    id: Optional[str] = None
+
+
+class TaskTrackingBatchRequest(BaseModel):
+    # Bounded here so an oversized batch is rejected before every item's image is validated
+    items: List[TaskTrackingBatchItem] = Field(min_length=1, max_length=TRACK_TASK_BATCH_MAX_ITEMS)
 
 
 class TaskTrackingResponse(BaseModel):
@@ -28,3 +40,20 @@ class TaskTrackingResponse(BaseModel):
     confidence: float
     reasoning: str
     nudge: Optional[str] = None
+
+
+class TaskTrackingBatchLine(BaseModel):
+    """One NDJSON line of a batch response; exactly one of result and error is set"""
+    index: int
+    id: Optional[str] = None
+    result: Optional[TaskTrackingResponse] = None
+    error: Optional[str] = None
+
+
+class TaskAnalysis(BaseModel):
+    """Schema the vision model is constrained to when analyzing a screenshot"""
+    model_config = ConfigDict(extra="forbid")
+
+    status: Literal["on_track", "off_track", "unknown"]
+    confidence: float = Field(ge=0.0, le=1.0)
+    reasoning: str
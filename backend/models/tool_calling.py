@@ -1,8 +1,14 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+# Conversation IDs are issued by the server as UUID4 hex strings
+CONVERSATION_ID_PATTERN = r"^[0-9a-f]{32}$"
 
 
 class ToolCallingRequest(BaseModel):
     prompt: str
+    conversation_id: Optional[str] = Field(default=None, pattern=CONVERSATION_ID_PATTERN)
 
 
 class ToolCallingResponse(BaseModel):
@@ -1,41 +1,198 @@
-from fastapi import APIRouter
+import asyncio
+import binascii
+from typing import List, Optional, Union
 
-from models.core import PingRequest, PingResponse, TaskTrackingRequest, TaskTrackingResponse
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+
+from config import MAX_UPLOAD_BYTES
 from models.agent_personality import AgentPersonalityRequest, AgentPersonalityResponse
+from models.core import (
+    PingMessage,
+    PingRequest,
+    PingResponse,
+    TaskTrackingBatchLine,
+    TaskTrackingBatchRequest,
+    TaskTrackingRequest,
+    TaskTrackingResponse,
+)
+from services.agent_personality_manager import service as agent_personality_service
+from services.image_processing_service import decode_image_base64
+from services.metrics_service import service as metrics_service
 from services.openai_inference import service as openai_service
+from services.session_store_service import DEFAULT_SESSION_ID
 from services.task_tracking_service import service as task_tracking_service
-from services.agent_personality_manager import service as agent_personality_service
+
+
+# Room for the form fields sent alongside the image, such as a ping's message history
+_UPLOAD_FORM_OVERHEAD_BYTES = 1024 * 1024
+_MAX_UPLOAD_BODY_BYTES = MAX_UPLOAD_BYTES + _UPLOAD_FORM_OVERHEAD_BYTES
+
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds {_MAX_UPLOAD_BODY_BYTES} bytes")
+
+
+class _UploadLimitRoute(APIRoute):
+    """Rejects oversized multipart bodies before Starlette spools them, by header or while streaming"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            content_length = request.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > _MAX_UPLOAD_BODY_BYTES:
+                raise _upload_too_large()
+
+            received = 0
+
+            async def receive():
+                nonlocal received
+                message = await request.receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > _MAX_UPLOAD_BODY_BYTES:
+                        raise _upload_too_large()
+                return message
+
+            return await handler(Request(request.scope, receive))
+
+        return limited_handler
 
 
 core_router = APIRouter()
+_upload_router = APIRouter(route_class=_UploadLimitRoute)
+
+_ping_messages_adapter = TypeAdapter(List[PingMessage])
+
+
+async def _read_image_upload(image: UploadFile) -> bytes:
+    if image.size is not None and image.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image exceeds {MAX_UPLOAD_BYTES} bytes")
+
+    data = await image.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image exceeds {MAX_UPLOAD_BYTES} bytes")
+    if not data:
+        raise HTTPException(status_code=400, detail="Image upload is empty")
+    return data
+
+
+def _batch_line(index: int, item_id: Optional[str], outcome: Union[dict, Exception]) -> TaskTrackingBatchLine:
+    if not isinstance(outcome, Exception):
+        try:
+            return TaskTrackingBatchLine(index=index, id=item_id, result=TaskTrackingResponse(**outcome))
+        except ValidationError as e:
+            outcome = e
+    return TaskTrackingBatchLine(index=index, id=item_id, error=str(outcome) or type(outcome).__name__)
 
 
 @core_router.post("/ping", response_model=PingResponse)
 async def ping(payload: PingRequest) -> PingResponse:
-    result = openai_service.inference(
+    metrics_service.mark_parsed()
+    try:
+        with metrics_service.span("decode"):
+            image_bytes = await asyncio.to_thread(decode_image_base64, payload.image_base64)
+    except (binascii.Error, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image encoding: {str(e)}")
+
+    result = await openai_service.inference_async(
         context=payload.context,
         prompt="Summarize the image content.",
-        image_base64=payload.image_base64,
+        image_bytes=image_bytes,
         messages=[message.model_dump() for message in payload.messages] if payload.messages else None,
+        endpoint="ping",
+    )
+    return PingResponse(result=result)
+
+
+@_upload_router.post("/ping/upload", response_model=PingResponse)
+async def ping_upload(
+    context: str = Form(...),
+    image: UploadFile = File(...),
+    messages: Optional[str] = Form(None),
+) -> PingResponse:
+    """Multipart variant of /ping that takes the screenshot as raw bytes; messages is a JSON array"""
+    metrics_service.mark_parsed()
+    try:
+        parsed_messages = _ping_messages_adapter.validate_json(messages) if messages else None
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+
+    image_bytes = await _read_image_upload(image)
+    result = await openai_service.inference_async(
+        context=context,
+        prompt="Summarize the image content.",
+        image_bytes=image_bytes,
+        messages=[message.model_dump() for message in parsed_messages] if parsed_messages else None,
+        endpoint="ping",
     )
     return PingResponse(result=result)
 
 
 @core_router.post("/track-task", response_model=TaskTrackingResponse)
 async def track_task(payload: TaskTrackingRequest) -> TaskTrackingResponse:
+    metrics_service.mark_parsed()
     result = await task_tracking_service.analyze_task_status(
         intent=payload.intent,
-        image_base64=payload.image_base64
+        image_base64=payload.image_base64,
+        session_id=payload.session_id or DEFAULT_SESSION_ID,
     )
     return TaskTrackingResponse(**result)
 
 
+@_upload_router.post("/track-task/upload", response_model=TaskTrackingResponse)
+async def track_task_upload(
+    intent: str = Form(...),
+    image: UploadFile = File(...),
+    session_id: Optional[str] = Form(None),
+) -> TaskTrackingResponse:
+    """Multipart variant of /track-task that takes the screenshot as raw bytes"""
+    metrics_service.mark_parsed()
+    image_bytes = await _read_image_upload(image)
+    result = await task_tracking_service.analyze_task_status(
+        intent=intent,
+        image_bytes=image_bytes,
+        session_id=session_id or DEFAULT_SESSION_ID,
+    )
+    return TaskTrackingResponse(**result)
+
+
+@core_router.post("/track-task/batch")
+async def track_task_batch(payload: TaskTrackingBatchRequest) -> StreamingResponse:
+    """Analyze many (intent, screenshot) pairs, streaming one NDJSON line per item as it completes"""
+    metrics_service.mark_parsed()
+    items = [
+        {
+            "intent": item.intent,
+            "image_base64": item.image_base64,
+            "session_id": item.session_id or DEFAULT_SESSION_ID,
+        }
+        for item in payload.items
+    ]
+    ids = [item.id for item in payload.items]
+
+    async def stream_results():
+        async for index, outcome in task_tracking_service.analyze_task_status_batch(items):
+            yield _batch_line(index, ids[index], outcome).model_dump_json(exclude_unset=True) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@core_router.get("/track-task/history")
+async def get_track_task_history(session_id: Optional[str] = None) -> list:
+    """Get a session's recent intents and verdicts"""
+    return await task_tracking_service.get_intent_history(session_id or DEFAULT_SESSION_ID)
+
 
 @core_router.post("/agent-personality", response_model=AgentPersonalityResponse)
 async def set_agent_personality(payload: AgentPersonalityRequest) -> AgentPersonalityResponse:
     """Set the agent's name and personality description"""
-    agent_personality_service.set_personality(
-        personality_description=payload.personality_description
+    await agent_personality_service.set_personality(
+        personality_description=payload.personality_description,
+        session_id=payload.session_id or DEFAULT_SESSION_ID,
     )
 
     return AgentPersonalityResponse(
@@ -45,9 +202,9 @@ async def set_agent_personality(payload: AgentPersonalityRequest) -> AgentPerson
 
 
 @core_router.get("/agent-personality")
-async def get_agent_personality() -> dict:
+async def get_agent_personality(session_id: Optional[str] = None) -> dict:
     """Get the current agent personality settings"""
-    return agent_personality_service.get_personality_info()
+    return await agent_personality_service.get_personality_info(session_id or DEFAULT_SESSION_ID)
 
 
 @core_router.post("/echo")
@@ -55,3 +212,6 @@ async def echo_message(payload: dict) -> dict:
     message = payload.get("message", "")
     print(f"[Backend] Received message: {message}")
     return {"message": f"Echo: {message}", "received_at": "2024-01-01T00:00:00Z"}
+
+
+core_router.include_router(_upload_router)
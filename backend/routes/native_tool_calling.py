@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 
 from models.tool_calling import ToolCallingRequest
+from services.metrics_service import service as metrics_service
 from services.native_tool_calling_service import service as native_tool_calling_service
 
 
@@ -10,8 +11,9 @@ native_tool_calling_router = APIRouter()
 
 @native_tool_calling_router.post("/execute-stream")
 async def execute_native_tool_calling_stream(payload: ToolCallingRequest):
+    metrics_service.mark_parsed()
     return StreamingResponse(
-        native_tool_calling_service.execute_with_streaming(payload.prompt),
+        native_tool_calling_service.execute_with_streaming(payload.prompt, payload.conversation_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -22,6 +24,7 @@ async def execute_native_tool_calling_stream(payload: ToolCallingRequest):
 
 @native_tool_calling_router.post("/execute")
 async def execute_native_tool_calling(payload: ToolCallingRequest):
-    """Synchronous execution endpoint for testing"""
-    result = native_tool_calling_service.execute_sync(payload.prompt)
+    """Non-streaming execution endpoint for testing"""
+    metrics_service.mark_parsed()
+    result = await native_tool_calling_service.execute(payload.prompt, payload.conversation_id)
     return result
\ No newline at end of file
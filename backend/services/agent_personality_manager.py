@@ -1,26 +1,46 @@
+from typing import Callable, List
 
+from services.session_store_service import DEFAULT_SESSION_ID, service as session_store_service
 
-class AgentPersonalityManager:
-    def __init__(self) -> None:
-        self._personality_description: str = "You are a fun, encouraging Gen Z/millennial assistant who speaks casually but is super supportive. You use modern slang, emojis, and keep things light while being genuinely helpful. You can manage emails, Github, and Google Docs."
+_NAMESPACE = "personality"
 
-    def set_personality(self, personality_description: str) -> None:
-        """Set the agent's name and personality description"""
-        self._personality_description = personality_description.strip()
+DEFAULT_PERSONALITY = "You are a fun, encouraging Gen Z/millennial assistant who speaks casually but is super supportive. You use modern slang, emojis, and keep things light while being genuinely helpful. You can manage emails, Github, and Google Docs."
 
-    def get_personality_description(self) -> str:
-        """Get the current personality description"""
-        return self._personality_description
 
-    def get_formatted_context(self) -> str:
+class AgentPersonalityManager:
+    def __init__(self) -> None:
+        self._store = session_store_service
+        self._listeners: List[Callable[[str], None]] = []
+
+    async def set_personality(self, personality_description: str, session_id: str = DEFAULT_SESSION_ID) -> None:
+        """Set the agent's personality description for a session (the default session applies to all others)"""
+        previous = await self.get_personality_description(session_id)
+        personality_description = personality_description.strip()
+        await self._store.set_async(_NAMESPACE, session_id, personality_description)
+        if personality_description != previous:
+            for listener in self._listeners:
+                listener(personality_description)
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback invoked with the new description whenever this worker changes the personality"""
+        self._listeners.append(listener)
+
+    async def get_personality_description(self, session_id: str = DEFAULT_SESSION_ID) -> str:
+        """Get the personality description for a session, falling back to the default session's"""
+        description = await self._store.get_async(_NAMESPACE, session_id)
+        if description is None and session_id != DEFAULT_SESSION_ID:
+            description = await self._store.get_async(_NAMESPACE, DEFAULT_SESSION_ID)
+        return description if description is not None else DEFAULT_PERSONALITY
+
+    async def get_formatted_context(self, session_id: str = DEFAULT_SESSION_ID) -> str:
         """Get the formatted context for LLM inference"""
-        return f"{self._personality_description} When given multi-step tasks, execute them step by step using available tools. Always complete the entire requested task."
+        return f"{await self.get_personality_description(session_id)} When given multi-step tasks, execute them step by step using available tools. Always complete the entire requested task."
 
-    def get_personality_info(self) -> dict:
+    async def get_personality_info(self, session_id: str = DEFAULT_SESSION_ID) -> dict:
         """Get all personality information as a dictionary"""
         return {
-            "personality_description": self._personality_description
+            "personality_description": await self.get_personality_description(session_id)
         }
 
 
-service = AgentPersonalityManager()
\ No newline at end of file
+service = AgentPersonalityManager()
@@ -0,0 +1,184 @@
+import functools
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from config import CONTEXT_TOKEN_BUDGET, CONTEXT_TOOL_EXCERPT_CHARS
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding():
+    # get_encoding downloads the BPE file on first use, which fails on offline deploys
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning("Falling back to estimated token counts: %s", e)
+        return None
+
+
+def count_text_tokens(text: str) -> int:
+    encoding = _load_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+# Per-message framing tokens added by the chat format
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    text = content or ""
+
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call["function"] if isinstance(tool_call, dict) else tool_call.function
+        if isinstance(function, dict):
+            text += function.get("name", "") + function.get("arguments", "")
+        else:
+            text += function.name + function.arguments
+    return text
+
+
+class ContextWindow:
+    """
+    Keeps one agent run's message history under a token budget.
+
+    Older tool results are compacted to an excerpt first; if that is not enough, the newest
+    messages are truncated. The caller's messages are never modified: fit returns the list to send,
+    leaves the leading system messages untouched and keeps each compaction once made, so the prompt
+    prefix stays byte-identical from one iteration to the next.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int,
+        excerpt_chars: int,
+        count_tokens: Callable[[str], int] = count_text_tokens,
+    ) -> None:
+        self._budget_tokens = budget_tokens
+        self._excerpt_chars = excerpt_chars
+        self._count_tokens = count_tokens
+        self._counts: Dict[int, Tuple[str, int]] = {}
+        self._replacements: Dict[int, str] = {}
+        self._compacted: Dict[int, int] = {}
+        self._truncated: Set[int] = set()
+        self.tokens_saved = 0
+        self.last_prompt_tokens = 0
+
+    def _message_tokens(self, index: int, message: Dict[str, Any]) -> int:
+        text = _message_text(message)
+        cached = self._counts.get(index)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        tokens = self._count_tokens(text) + _MESSAGE_OVERHEAD_TOKENS
+        self._counts[index] = (text, tokens)
+        return tokens
+
+    def _replace(self, index: int, message: Dict[str, Any], current: Dict[str, Any], content: str) -> Dict[str, Any]:
+        replaced = {**message, "content": content}
+        saved = self._message_tokens(index, current) - self._message_tokens(index, replaced)
+        self._replacements[index] = content
+        self.tokens_saved += saved
+        return replaced
+
+    def _compact(self, index: int, message: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        original_tokens = self._count_tokens(message["content"]) + _MESSAGE_OVERHEAD_TOKENS
+        excerpt = message["content"][:self._excerpt_chars].rstrip()
+        compacted = self._replace(
+            index, message, current,
+            f"{excerpt}\n...[truncated earlier tool output, {original_tokens} tokens originally]",
+        )
+        self._compacted[index] = original_tokens - self._message_tokens(index, compacted)
+        return compacted
+
+    def _truncate(self, index: int, message: Dict[str, Any], current: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+        content = message["content"]
+        marker = "\n...[truncated to fit the context budget]"
+        keep_chars = len(content)
+        truncated = current
+        while keep_chars > 0 and self._message_tokens(index, truncated) > max_tokens:
+            tokens = self._message_tokens(index, truncated)
+            keep_chars = min(keep_chars - 1, int(keep_chars * max_tokens / tokens * 0.9))
+            truncated = {**message, "content": content[:max(keep_chars, 0)].rstrip() + marker}
+        self._truncated.add(index)
+        return self._replace(index, message, current, truncated["content"])
+
+    def fit(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return messages fitted to the budget, leaving the caller's list and its messages unchanged"""
+        fitted = [
+            {**message, "content": self._replacements[index]} if index in self._replacements else message
+            for index, message in enumerate(messages)
+        ]
+        total = sum(self._message_tokens(index, message) for index, message in enumerate(fitted))
+
+        prefix_end = next(
+            (index for index, message in enumerate(messages) if message.get("role") != "system"),
+            len(messages),
+        )
+        # Tool results after the latest assistant turn are what the model is about to read
+        latest_turn_start = max(
+            (index for index, message in enumerate(messages) if message.get("role") == "assistant"),
+            default=len(messages),
+        )
+
+        for index in range(prefix_end, latest_turn_start):
+            if total <= self._budget_tokens:
+                break
+            message = messages[index]
+            if message.get("role") != "tool" or index in self._compacted:
+                continue
+            if len(message.get("content") or "") <= self._excerpt_chars:
+                continue
+            before = self._message_tokens(index, fitted[index])
+            fitted[index] = self._compact(index, message, fitted[index])
+            total -= before - self._message_tokens(index, fitted[index])
+
+        # Compaction alone can't help when the newest tool output or prompt is itself oversized
+        newest_start = max(prefix_end, min(latest_turn_start, len(messages) - 1))
+        for index in range(len(messages) - 1, newest_start - 1, -1):
+            if total <= self._budget_tokens:
+                break
+            message = messages[index]
+            if message.get("role") not in ("tool", "user") or not isinstance(message.get("content"), str):
+                continue
+            before = self._message_tokens(index, fitted[index])
+            allowed = max(_MESSAGE_OVERHEAD_TOKENS, before - (total - self._budget_tokens))
+            fitted[index] = self._truncate(index, message, fitted[index], allowed)
+            total -= before - self._message_tokens(index, fitted[index])
+
+        self.last_prompt_tokens = total
+        return fitted
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "prompt_tokens_estimate": self.last_prompt_tokens,
+            "tokens_saved": self.tokens_saved,
+            "tool_results_compacted": len(self._compacted),
+            "messages_truncated": len(self._truncated),
+        }
+
+
+class ContextManagerService:
+    def __init__(
+        self,
+        budget_tokens: int = CONTEXT_TOKEN_BUDGET,
+        excerpt_chars: int = CONTEXT_TOOL_EXCERPT_CHARS,
+    ) -> None:
+        self._budget_tokens = budget_tokens
+        self._excerpt_chars = excerpt_chars
+
+    def create_window(self, budget_tokens: Optional[int] = None) -> ContextWindow:
+        return ContextWindow(budget_tokens or self._budget_tokens, self._excerpt_chars)
+
+
+service = ContextManagerService()
@@ -0,0 +1,100 @@
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config import CONVERSATION_MAX_TURNS, CONVERSATION_TTL_SECONDS
+from models.tool_calling import CONVERSATION_ID_PATTERN
+from services.session_store_service import service as session_store_service
+
+_META_NAMESPACE = "conversation"
+_TURN_NAMESPACE = "conversation_turn"
+
+
+def serialize_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a chat message, including SDK tool call objects, into plain JSON without null fields"""
+    serialized = {key: value for key, value in message.items() if value is not None}
+    if "tool_calls" in serialized:
+        serialized["tool_calls"] = [
+            tool_call.model_dump() if hasattr(tool_call, "model_dump") else tool_call
+            for tool_call in serialized["tool_calls"]
+        ]
+    return serialized
+
+
+@dataclass
+class Conversation:
+    id: str
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    previous_response_id: Optional[str] = None
+
+
+class ConversationService:
+    """
+    Server-side turn history for the tool-calling agent, kept in the session store.
+
+    Conversation IDs are random UUIDs issued by new_id and only become loadable once the server
+    has stored a turn under them, so a client can't open or seed a history under an ID it chose.
+
+    Each turn (user prompt, assistant replies and tool results) is written once under its own key,
+    so appending never rewrites earlier turns. Turns always start with a user message, which keeps
+    assistant tool calls and their results together when old turns fall out of the window.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = CONVERSATION_MAX_TURNS,
+        ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+    ) -> None:
+        self._store = session_store_service
+        self._max_turns = max_turns
+        self._ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    async def load(self, conversation_id: str) -> Conversation:
+        """Load a conversation previously issued by this server; raises ValueError for any other ID"""
+        if not re.match(CONVERSATION_ID_PATTERN, conversation_id):
+            raise ValueError("Invalid conversation_id")
+        meta = await self._store.get_async(_META_NAMESPACE, conversation_id)
+        if meta is None:
+            raise ValueError("Unknown or expired conversation_id")
+
+        turn_keys = [
+            f"{conversation_id}:{turn_index}"
+            for turn_index in range(max(0, meta["turns"] - self._max_turns), meta["turns"])
+        ]
+        messages: List[Dict[str, Any]] = []
+        # A turn can be missing briefly while a concurrent append is between its two writes
+        for turn in await self._store.get_many_async(_TURN_NAMESPACE, turn_keys, []):
+            messages.extend(turn)
+        return Conversation(
+            id=conversation_id,
+            messages=messages,
+            previous_response_id=meta.get("previous_response_id"),
+        )
+
+    async def append_turn(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        previous_response_id: Optional[str] = None,
+    ) -> None:
+        # A turn run without provider-side state clears the reference so the next one re-sends history
+        def next_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+            return {"turns": meta["turns"] + 1, "previous_response_id": previous_response_id}
+
+        meta = await self._store.update_async(
+            _META_NAMESPACE, conversation_id, next_meta, {"turns": 0}, ttl_seconds=self._ttl_seconds
+        )
+        await self._store.set_async(
+            _TURN_NAMESPACE,
+            f"{conversation_id}:{meta['turns'] - 1}",
+            [serialize_message(message) for message in messages],
+            ttl_seconds=self._ttl_seconds,
+        )
+
+
+service = ConversationService()
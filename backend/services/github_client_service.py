@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from config import (
+    GITHUB_API_URL,
+    GITHUB_ETAG_CACHE_SIZE,
+    GITHUB_MAX_CONNECTIONS,
+    GITHUB_TIMEOUT_SECONDS,
+    GITHUB_TOKEN,
+)
+
+ISSUE_FIELDS = ("number", "title", "state", "html_url")
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class GitHubResponse:
+    def __init__(self, status_code: int, data: Any, text: str = "", from_cache: bool = False) -> None:
+        self.status_code = status_code
+        self.data = data
+        self.text = text
+        self.from_cache = from_cache
+
+
+def trim_issues(issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep only the issue fields the tools render, and drop pull requests the issues API also returns"""
+    return [
+        {field: issue.get(field) for field in ISSUE_FIELDS}
+        for issue in issues
+        if "pull_request" not in issue
+    ]
+
+
+class GitHubClientService:
+    def __init__(
+        self,
+        base_url: str = GITHUB_API_URL,
+        token: Optional[str] = GITHUB_TOKEN,
+        timeout_seconds: float = GITHUB_TIMEOUT_SECONDS,
+        max_connections: int = GITHUB_MAX_CONNECTIONS,
+        etag_cache_size: int = GITHUB_ETAG_CACHE_SIZE,
+    ) -> None:
+        self._base_url = base_url.rstrip("/")
+        self._token = token
+        self._timeout = httpx.Timeout(timeout_seconds)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._client_lock = threading.Lock()
+        self._etag_cache_size = etag_cache_size
+        self._etag_cache: "OrderedDict[CacheKey, Tuple[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._stats = {"requests": 0, "not_modified": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self._token)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"token {self._token}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self._base_url,
+                        headers=self._headers(),
+                        timeout=self._timeout,
+                        limits=self._limits,
+                    )
+        return self._client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self._base_url,
+                headers=self._headers(),
+                timeout=self._timeout,
+                limits=self._limits,
+            )
+        return self._async_client
+
+    @staticmethod
+    def _cache_key(path: str, params: Dict[str, Any]) -> CacheKey:
+        return path, tuple(sorted((key, str(value)) for key, value in params.items()))
+
+    def _conditional_headers(self, key: CacheKey) -> Dict[str, str]:
+        with self._cache_lock:
+            cached = self._etag_cache.get(key)
+        return {"If-None-Match": cached[0]} if cached else {}
+
+    def _handle_get_response(self, key: CacheKey, response: httpx.Response, trim) -> GitHubResponse:
+        with self._cache_lock:
+            self._stats["requests"] += 1
+            if response.status_code == 304 and key in self._etag_cache:
+                self._stats["not_modified"] += 1
+                self._etag_cache.move_to_end(key)
+                return GitHubResponse(200, self._etag_cache[key][1], from_cache=True)
+
+        if response.status_code != 200:
+            return GitHubResponse(response.status_code, None, response.text)
+
+        data = response.json()
+        if trim is not None:
+            data = trim(data)
+
+        etag = response.headers.get("ETag")
+        if etag:
+            with self._cache_lock:
+                self._etag_cache[key] = (etag, data)
+                self._etag_cache.move_to_end(key)
+                while len(self._etag_cache) > self._etag_cache_size:
+                    self._etag_cache.popitem(last=False)
+
+        return GitHubResponse(200, data)
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, trim=None) -> GitHubResponse:
+        """Conditional GET; unchanged resources are answered from the ETag cache via a 304"""
+        params = params or {}
+        key = self._cache_key(path, params)
+        response = self._sync_client().get(path, params=params, headers=self._conditional_headers(key))
+        return self._handle_get_response(key, response, trim)
+
+    async def aget(self, path: str, params: Optional[Dict[str, Any]] = None, trim=None) -> GitHubResponse:
+        params = params or {}
+        key = self._cache_key(path, params)
+        response = await self._get_async_client().get(
+            path, params=params, headers=self._conditional_headers(key)
+        )
+        return self._handle_get_response(key, response, trim)
+
+    def post(self, path: str, json: Dict[str, Any]) -> GitHubResponse:
+        response = self._sync_client().post(path, json=json)
+        return GitHubResponse(
+            response.status_code,
+            response.json() if response.status_code < 400 else None,
+            response.text,
+        )
+
+    async def apost(self, path: str, json: Dict[str, Any]) -> GitHubResponse:
+        response = await self._get_async_client().post(path, json=json)
+        return GitHubResponse(
+            response.status_code,
+            response.json() if response.status_code < 400 else None,
+            response.text,
+        )
+
+    def get_issues(self, repo: str, state: str = "open", per_page: int = 10) -> GitHubResponse:
+        return self.get(
+            f"/repos/{repo}/issues",
+            params={"state": state, "per_page": per_page},
+            trim=trim_issues,
+        )
+
+    async def aget_issues(self, repo: str, state: str = "open", per_page: int = 10) -> GitHubResponse:
+        return await self.aget(
+            f"/repos/{repo}/issues",
+            params={"state": state, "per_page": per_page},
+            trim=trim_issues,
+        )
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["etag_cache_entries"] = len(self._etag_cache)
+        return stats
+
+
+service = GitHubClientService()
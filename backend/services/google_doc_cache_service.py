@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import GOOGLE_DOC_CACHE_SIZE
+
+DRIVE_VERSION_FIELDS = "id,name,version,modifiedTime"
+
+_TEXT_RUN_FIELDS = "paragraph/elements/textRun/content"
+
+
+def _structural_fields(depth: int) -> str:
+    if depth == 0:
+        return _TEXT_RUN_FIELDS
+    inner = _structural_fields(depth - 1)
+    return (
+        f"{_TEXT_RUN_FIELDS},"
+        f"table/tableRows/tableCells/content({inner}),"
+        f"tableOfContents/content({inner})"
+    )
+
+
+# Only the text runs, including those nested inside tables, are requested; styling is skipped
+DOCUMENT_TEXT_FIELDS = f"title,body/content({_structural_fields(2)})"
+
+
+def extract_document_text(document: Dict[str, Any]) -> str:
+    """Collect text from paragraphs, tables and tables of contents in document order"""
+    parts: List[str] = []
+    stack: List[Dict[str, Any]] = list(reversed(document.get("body", {}).get("content", [])))
+
+    while stack:
+        element = stack.pop()
+        if "paragraph" in element:
+            for run in element["paragraph"].get("elements", []):
+                text = run.get("textRun", {}).get("content")
+                if text:
+                    parts.append(text)
+        elif "table" in element:
+            nested: List[Dict[str, Any]] = []
+            for row in element["table"].get("tableRows", []):
+                for cell in row.get("tableCells", []):
+                    nested.extend(cell.get("content", []))
+            stack.extend(reversed(nested))
+        elif "tableOfContents" in element:
+            stack.extend(reversed(element["tableOfContents"].get("content", [])))
+
+    return "".join(parts).strip()
+
+
+def version_token(drive_file: Dict[str, Any]) -> str:
+    return f"{drive_file.get('version', '')}:{drive_file.get('modifiedTime', '')}"
+
+
+class GoogleDocCacheService:
+    def __init__(self, max_entries: int = GOOGLE_DOC_CACHE_SIZE) -> None:
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, doc_id: str, version: str) -> Optional[Tuple[str, str]]:
+        """Return (title, text) if the cached copy matches the document's current version"""
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is None or entry[0] != version:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(doc_id)
+            self._hits += 1
+            return entry[1], entry[2]
+
+    def put(self, doc_id: str, version: str, title: str, text: str) -> None:
+        with self._lock:
+            self._entries[doc_id] = (version, title, text)
+            self._entries.move_to_end(doc_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doc_id: str) -> None:
+        with self._lock:
+            self._entries.pop(doc_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._entries)}
+
+
+service = GoogleDocCacheService()
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, TypeVar
+
+from config import (
+    OPENAI_HEDGE_DELAY_SECONDS,
+    OPENAI_HEDGE_MAX_RATE,
+    OPENAI_HEDGE_PERCENTILE,
+)
+from services.metrics_service import service as metrics_service
+
+T = TypeVar('T')
+
+_MIN_SAMPLES = 20
+_WINDOW = 200
+
+
+class HedgingService:
+    def __init__(
+        self,
+        percentile: float = OPENAI_HEDGE_PERCENTILE,
+        fallback_delay_seconds: float = OPENAI_HEDGE_DELAY_SECONDS,
+        max_rate: float = OPENAI_HEDGE_MAX_RATE,
+    ) -> None:
+        self._percentile = percentile
+        self._fallback_delay_seconds = fallback_delay_seconds
+        self._max_rate = max_rate
+        self._metrics = metrics_service
+        self._latencies: Deque[float] = deque(maxlen=_WINDOW)
+        self._recent_hedges: Deque[bool] = deque(maxlen=_WINDOW)
+        self._stats = {"requests": 0, "hedges_sent": 0, "hedges_won": 0, "hedges_rate_limited": 0}
+
+    def hedge_delay(self) -> float:
+        """Rolling percentile of recent latencies, or the configured delay until enough samples exist"""
+        if len(self._latencies) < _MIN_SAMPLES:
+            return self._fallback_delay_seconds
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self._percentile))]
+
+    def _may_hedge(self) -> bool:
+        return sum(self._recent_hedges) < self._max_rate * max(len(self._recent_hedges), 1)
+
+    async def run(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run operation, firing a duplicate if it hasn't finished within the hedge delay.
+
+        The first successful response wins and the other attempt is cancelled. If one attempt
+        fails, the other is still awaited; the first error is raised only if both fail.
+        """
+        self._stats["requests"] += 1
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(self._metrics.detached(operation()))
+        pending = {primary}
+
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if done or not self._may_hedge():
+                if not done:
+                    self._stats["hedges_rate_limited"] += 1
+                self._recent_hedges.append(False)
+                result = await primary
+                self._latencies.append(time.monotonic() - started_at)
+                return result
+
+            self._recent_hedges.append(True)
+            self._stats["hedges_sent"] += 1
+            hedge = asyncio.ensure_future(self._metrics.detached(operation()))
+            pending = {primary, hedge}
+
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._stats["hedges_won"] += 1
+                        self._latencies.append(time.monotonic() - started_at)
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["hedge_delay_seconds"] = self.hedge_delay()
+        stats["hedge_win_rate"] = stats["hedges_won"] / stats["hedges_sent"] if stats["hedges_sent"] else 0.0
+        return stats
+
+
+service = HedgingService()
@@ -0,0 +1,238 @@
+import asyncio
+import base64
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from PIL import Image, ImageOps
+
+from config import (
+    IMAGE_LOW_DETAIL_MAX_EDGE,
+    IMAGE_MAX_EDGE,
+    IMAGE_OUTPUT_FORMAT,
+    IMAGE_PROCESSING_WORKERS,
+    IMAGE_QUALITY,
+)
+
+logger = logging.getLogger(__name__)
+
+_MAGIC_PREFIXES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def decode_image_base64(image_base64: str) -> bytes:
+    """Decode a raw or data-URL base64 screenshot into image bytes"""
+    clean_base64 = image_base64.strip()
+    if clean_base64.startswith("data:"):
+        clean_base64 = clean_base64.split(",", 1)[-1]
+    # Line-wrapped base64 is fine, but any other stray character is rejected rather than skipped
+    return base64.b64decode("".join(clean_base64.split()), validate=True)
+
+
+def sniff_mime_type(image_bytes: bytes) -> Optional[str]:
+    """Detect the image MIME type from its magic bytes"""
+    for prefix, mime_type in _MAGIC_PREFIXES:
+        if image_bytes.startswith(prefix):
+            return mime_type
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+@dataclass
+class ProcessedImage:
+    data: bytes
+    mime_type: str
+    detail: str
+    width: int
+    height: int
+    bytes_in: int
+
+    @property
+    def bytes_out(self) -> int:
+        return len(self.data)
+
+    def to_data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+    def to_image_url_part(self) -> Dict[str, Any]:
+        return {
+            "type": "image_url",
+            "image_url": {"url": self.to_data_url(), "detail": self.detail},
+        }
+
+
+@dataclass
+class DecodedImage:
+    """A screenshot decoded once so hashing and re-encoding share the pixels"""
+    image: Image.Image
+    data: bytes
+    original_edge: int
+
+
+class ImageProcessingService:
+    def __init__(
+        self,
+        max_edge: int = IMAGE_MAX_EDGE,
+        output_format: str = IMAGE_OUTPUT_FORMAT,
+        quality: int = IMAGE_QUALITY,
+        low_detail_max_edge: int = IMAGE_LOW_DETAIL_MAX_EDGE,
+        workers: int = IMAGE_PROCESSING_WORKERS,
+    ) -> None:
+        self._max_edge = max_edge
+        self._output_format = output_format
+        self._quality = quality
+        self._low_detail_max_edge = low_detail_max_edge
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-processing")
+        self._stats_lock = threading.Lock()
+        self._images_processed = 0
+        self._total_bytes_in = 0
+        self._total_bytes_out = 0
+
+    @staticmethod
+    def _to_rgb(image: Image.Image) -> Image.Image:
+        # convert("RGB") drops alpha onto black; screenshots with transparency read better on white
+        if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            return background
+        return image.convert("RGB") if image.mode != "RGB" else image
+
+    def _detail_for(self, width: int, height: int) -> str:
+        return "low" if max(width, height) <= self._low_detail_max_edge else "high"
+
+    def _passthrough(self, image_bytes: bytes) -> ProcessedImage:
+        return ProcessedImage(
+            data=image_bytes,
+            mime_type=sniff_mime_type(image_bytes) or "image/png",
+            detail="auto",
+            width=0,
+            height=0,
+            bytes_in=len(image_bytes),
+        )
+
+    def decode(self, image_bytes: bytes) -> DecodedImage:
+        """Decode an image, letting JPEG decode straight to a reduced size when it is oversized"""
+        image = Image.open(io.BytesIO(image_bytes))
+        original_edge = max(image.size)
+        image.draft("RGB", (self._max_edge, self._max_edge))
+        image.load()
+        return DecodedImage(image=image, data=image_bytes, original_edge=original_edge)
+
+    def process_decoded(self, decoded: DecodedImage) -> ProcessedImage:
+        """Downscale and re-encode a decoded image for vision inference"""
+        image_bytes = decoded.data
+        if sniff_mime_type(image_bytes) is None:
+            return self._passthrough(image_bytes)
+
+        image = self._to_rgb(decoded.image)
+        if max(image.size) > self._max_edge:
+            # contain returns a copy, so the decoded image stays intact for other readers
+            image = ImageOps.contain(image, (self._max_edge, self._max_edge), Image.LANCZOS)
+
+        output = io.BytesIO()
+        if self._output_format == "webp":
+            image.save(output, format="WEBP", quality=self._quality, method=4)
+            mime_type = "image/webp"
+        else:
+            image.save(output, format="JPEG", quality=self._quality, optimize=True)
+            mime_type = "image/jpeg"
+        width, height = image.size
+
+        processed = ProcessedImage(
+            data=output.getvalue(),
+            mime_type=mime_type,
+            detail=self._detail_for(width, height),
+            width=width,
+            height=height,
+            bytes_in=len(image_bytes),
+        )
+
+        # Small screenshots can grow when re-encoded; keep whichever is cheaper to send
+        if processed.bytes_out >= processed.bytes_in and decoded.original_edge <= self._max_edge:
+            processed = ProcessedImage(
+                data=image_bytes,
+                mime_type=sniff_mime_type(image_bytes),
+                detail=processed.detail,
+                width=width,
+                height=height,
+                bytes_in=len(image_bytes),
+            )
+
+        return processed
+
+    def process_bytes(self, image_bytes: bytes) -> ProcessedImage:
+        """Downscale and re-encode an image for vision inference"""
+        if sniff_mime_type(image_bytes) is None:
+            return self._passthrough(image_bytes)
+        return self.process_decoded(self.decode(image_bytes))
+
+    def _prepare_with(self, process: Callable[[Any], ProcessedImage], source: Any, image_bytes: bytes) -> ProcessedImage:
+        try:
+            processed = process(source)
+        except (OSError, Image.DecompressionBombError) as e:
+            logger.warning("Image preprocessing failed, sending original bytes: %s", e)
+            processed = self._passthrough(image_bytes)
+
+        self._record(processed)
+        return processed
+
+    def prepare(self, image_bytes: bytes) -> ProcessedImage:
+        """Prepare raw image bytes for vision inference, falling back to the original on decode errors"""
+        return self._prepare_with(self.process_bytes, image_bytes, image_bytes)
+
+    def prepare_decoded(self, decoded: DecodedImage) -> ProcessedImage:
+        """Prepare an already decoded image, so the caller's decode is not repeated"""
+        return self._prepare_with(self.process_decoded, decoded, decoded.data)
+
+    async def prepare_async(self, image_bytes: bytes) -> ProcessedImage:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.prepare, image_bytes)
+
+    async def prepare_decoded_async(self, decoded: DecodedImage) -> ProcessedImage:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.prepare_decoded, decoded)
+
+    def process_base64(self, image_base64: str) -> ProcessedImage:
+        """Decode a base64 screenshot and prepare it for vision inference"""
+        return self.prepare(decode_image_base64(image_base64))
+
+    async def process_base64_async(self, image_base64: str) -> ProcessedImage:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.process_base64, image_base64)
+
+    def _record(self, processed: ProcessedImage) -> None:
+        with self._stats_lock:
+            self._images_processed += 1
+            self._total_bytes_in += processed.bytes_in
+            self._total_bytes_out += processed.bytes_out
+        logger.info(
+            "Image preprocessed: %d bytes in, %d bytes out (%s %dx%d, detail=%s)",
+            processed.bytes_in,
+            processed.bytes_out,
+            processed.mime_type,
+            processed.width,
+            processed.height,
+            processed.detail,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "images_processed": self._images_processed,
+            "total_bytes_in": self._total_bytes_in,
+            "total_bytes_out": self._total_bytes_out,
+            "compression_ratio": (
+                self._total_bytes_out / self._total_bytes_in if self._total_bytes_in else 1.0
+            ),
+        }
+
+
+service = ImageProcessingService()
@@ -0,0 +1,280 @@
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+T = TypeVar('T')
+
+# Spans outside any HTTP request are attributed to this endpoint: nudge pool refills, and upstream
+# calls that several requests share (coalesced or hedged) and so belong to none of them
+BACKGROUND_ENDPOINT = "background"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...]) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        # Per label set: non-cumulative bucket counts (last slot is +Inf), sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Tuple[str, ...], seconds: float) -> None:
+        index = bisect_left(_BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(_BUCKETS) + 1), [0.0])
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1][0] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total[0]) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(_BUCKETS + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...]) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def add(self, labels: Tuple[str, ...], amount: float) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            snapshot = list(self._values.items())
+        for labels, value in snapshot:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class _RequestTimings:
+    __slots__ = ("started_at", "stages")
+
+    def __init__(self, started_at: float) -> None:
+        self.started_at = started_at
+        self.stages: List[Tuple[str, float]] = []
+
+
+_current_request: ContextVar[Optional[_RequestTimings]] = ContextVar("current_request_timings", default=None)
+
+
+class _Span:
+    """Times one stage of the current request; kept to a couple of clock reads and an append"""
+    __slots__ = ("_metrics", "_stage", "_started_at")
+
+    def __init__(self, metrics: "MetricsService", stage: str) -> None:
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self) -> "_Span":
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        elapsed = time.perf_counter() - self._started_at
+        timings = _current_request.get()
+        if timings is None:
+            self._metrics.stage_duration.observe((BACKGROUND_ENDPOINT, self._stage), elapsed)
+        else:
+            timings.stages.append((self._stage, elapsed))
+
+
+def _outcome(exc_type: Any) -> str:
+    if exc_type is None:
+        return "ok"
+    return "timeout" if issubclass(exc_type, (TimeoutError, asyncio.TimeoutError)) else "error"
+
+
+class _TimedCall:
+    """Tracks duration of an upstream call labelled with its outcome, and optionally its in-flight count"""
+    __slots__ = ("_histogram", "_gauge", "_labels", "_started_at")
+
+    def __init__(self, histogram: Histogram, gauge: Optional[Gauge], labels: Tuple[str, ...]) -> None:
+        self._histogram = histogram
+        self._gauge = gauge
+        self._labels = labels
+
+    def __enter__(self) -> "_TimedCall":
+        if self._gauge is not None:
+            self._gauge.add(self._labels[:1], 1)
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        elapsed = time.perf_counter() - self._started_at
+        if self._gauge is not None:
+            self._gauge.add(self._labels[:1], -1)
+        self._histogram.observe(self._labels + (_outcome(exc_type),), elapsed)
+
+
+def _numeric_stats(stats: Dict[str, Any], key: str = "") -> Iterator[Tuple[str, str, float]]:
+    """Yield (key, stat, value) for the numbers in a get_stats dict; one level of nesting becomes the key"""
+    for name, value in stats.items():
+        if isinstance(value, dict) and not key:
+            yield from _numeric_stats(value, name)
+        elif isinstance(value, (bool, int, float)):
+            yield key, name, float(value)
+
+
+class MetricsService:
+    def __init__(self) -> None:
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("endpoint", "method", "status")
+        )
+        self.requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being served", ())
+        self.stage_duration = Histogram(
+            "request_stage_duration_seconds", "Latency of each stage within a request", ("endpoint", "stage")
+        )
+        self.openai_duration = Histogram(
+            "openai_request_duration_seconds", "OpenAI call latency", ("model", "endpoint", "outcome")
+        )
+        self.openai_in_flight = Gauge("openai_requests_in_flight", "OpenAI calls awaiting a response", ("model",))
+        self.tool_duration = Histogram("tool_call_duration_seconds", "Tool execution latency", ("tool", "outcome"))
+        self.tools_in_flight = Gauge("tool_calls_in_flight", "Tool calls currently executing", ("tool",))
+        self._stats_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def span(self, stage: str) -> _Span:
+        return _Span(self, stage)
+
+    def mark_parsed(self) -> None:
+        """Record routing, body parsing and validation as the time since the request arrived"""
+        timings = _current_request.get()
+        if timings is not None:
+            timings.stages.append(("parse", time.perf_counter() - timings.started_at))
+
+    def openai_call(self, model: str, endpoint: str) -> _TimedCall:
+        return _TimedCall(self.openai_duration, self.openai_in_flight, (model, endpoint))
+
+    def tool_call(self, tool: str) -> _TimedCall:
+        """Time a tool call as the caller sees it; the thread running it is tracked by track_tool_thread"""
+        return _TimedCall(self.tool_duration, None, (tool,))
+
+    def track_tool_thread(self, tool: str, future: Any) -> None:
+        """Count a tool as in flight until its worker future finishes, even after the caller timed out"""
+        self.tools_in_flight.add((tool,), 1)
+        future.add_done_callback(lambda _: self.tools_in_flight.add((tool,), -1))
+
+    @staticmethod
+    async def detached(awaitable: Awaitable[T]) -> T:
+        """
+        Await outside the current request's timing scope. Wrap coroutines handed to create_task or
+        ensure_future with this when the task outlives or is shared beyond the request that started it;
+        tasks copy the caller's context, so their spans would otherwise land on that one request.
+        """
+        _current_request.set(None)
+        return await awaitable
+
+    def register_stats(self, component: str, get_stats: Callable[[], Dict[str, Any]]) -> None:
+        """Expose a service's get_stats counters on /metrics as component_stat samples"""
+        self._stats_sources[component] = get_stats
+
+    def _render_component_stats(self) -> List[str]:
+        lines = [
+            "# HELP component_stat Counters and ratios reported by each service's get_stats",
+            "# TYPE component_stat gauge",
+        ]
+        for component, get_stats in list(self._stats_sources.items()):
+            for key, stat, value in _numeric_stats(get_stats()):
+                labels = _format_labels(("component", "key", "stat"), (component, key, stat))
+                lines.append(f"component_stat{labels} {value:g}")
+        return lines
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in (
+            self.request_duration,
+            self.requests_in_flight,
+            self.stage_duration,
+            self.openai_duration,
+            self.openai_in_flight,
+            self.tool_duration,
+            self.tools_in_flight,
+        ):
+            lines.extend(metric.render())
+        lines.extend(self._render_component_stats())
+        return "\n".join(lines) + "\n"
+
+
+def _server_timing(timings: _RequestTimings) -> bytes:
+    totals: Dict[str, float] = {}
+    for stage, elapsed in timings.stages:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    totals["total"] = time.perf_counter() - timings.started_at
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items()).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that opens a timing scope per request, adds a Server-Timing header with the
+    stages recorded so far when the response starts, and folds them into the histograms at the end.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = _RequestTimings(time.perf_counter())
+        token = _current_request.set(timings)
+        status = "500"
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", _server_timing(timings))]
+            await send(message)
+
+        service.requests_in_flight.add((), 1)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            service.requests_in_flight.add((), -1)
+            _current_request.reset(token)
+            # The router stores the matched route in scope, which keeps label cardinality bounded
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            for stage, elapsed in timings.stages:
+                service.stage_duration.observe((endpoint, stage), elapsed)
+            service.request_duration.observe(
+                (endpoint, scope["method"], status), time.perf_counter() - timings.started_at
+            )
+
+
+service = MetricsService()
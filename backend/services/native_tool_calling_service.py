@@ -1,8 +1,24 @@
+import asyncio
 import json
-from typing import AsyncGenerator, Dict, Any
-from openai import OpenAI
-
-from config import OPENAI_KEY
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
+
+from config import (
+    OPENAI_KEY,
+    OPENAI_REQUEST_DEADLINE_SECONDS,
+    TOOL_CALL_CONCURRENCY,
+    TOOL_CALLING_RESPONSES_API,
+)
+from constants.prompts import ToolCallingPrompts
+from services.context_manager_service import service as context_manager_service
+from services.conversation_service import Conversation, serialize_message, service as conversation_service
+from services.metrics_service import service as metrics_service
+from services.prompt_cache_stats_service import service as prompt_cache_stats_service
+from services.retry_service import service as retry_service
 from services.tool_registry_service import service as tool_registry_service
 
 
@@ -11,108 +27,362 @@ class NativeToolCallingService:
         if not OPENAI_KEY:
             raise ValueError("OPENAI_KEY is required")
 
-        self._client = OpenAI(api_key=OPENAI_KEY)
+        self._client = AsyncOpenAI(api_key=OPENAI_KEY, max_retries=0)
         self._tool_registry = tool_registry_service
-
-    async def execute_with_streaming(self, prompt: str) -> AsyncGenerator[str, None]:
-        """Execute tool calling with streaming responses"""
+        self._context_manager = context_manager_service
+        self._conversations = conversation_service
+        self._prompt_cache_stats = prompt_cache_stats_service
+        self._retry_service = retry_service
+        self._metrics = metrics_service
+
+    async def _timed_create(self, create: Callable[..., Awaitable[Any]], endpoint: str, **kwargs) -> Any:
+        """Make a model call under the OpenAI latency metrics; for streams this is time to first byte"""
+        with self._metrics.openai_call(kwargs["model"], endpoint):
+            return await create(**kwargs)
+
+    @staticmethod
+    def _parse_tool_arguments(tool_call) -> Optional[Dict[str, Any]]:
         try:
-            yield f"data: {json.dumps({'type': 'started', 'message': 'Tool calling execution started'})}\n\n"
-
-            tools = self._tool_registry.get_tool_schemas()
-
-            messages = [
-                {"role": "system", "content": "You are a helpful assistant that can manage emails, Github, and Google Docs. When given multi-step tasks, execute them step by step using available tools. Always complete the entire requested task."},
-                {"role": "user", "content": prompt}
-            ]
-
-            # Sequential tool chaining loop
-            max_iterations = 10
-            iteration = 0
-
-            while iteration < max_iterations:
-                iteration += 1
+            arguments = json.loads(tool_call.function.arguments or "{}")
+        except json.JSONDecodeError:
+            return None
+        return arguments if isinstance(arguments, dict) else None
+
+    async def _execute_tool_call(
+        self,
+        tool_call,
+        function_args: Optional[Dict[str, Any]],
+        semaphore: asyncio.Semaphore,
+    ) -> Dict[str, Any]:
+        """Run one tool call and return its outcome; never raises so sibling calls are unaffected"""
+        function_name = tool_call.function.name
+        outcome: Dict[str, Any] = {
+            "tool_call_id": tool_call.id,
+            "function": function_name,
+            "arguments": function_args,
+        }
+
+        if function_args is None:
+            outcome["error"] = f"Error executing {function_name}: invalid JSON arguments {tool_call.function.arguments!r}"
+            return outcome
+
+        async with semaphore:
+            try:
+                outcome["result"] = await self._tool_registry.call_function_async(function_name, **function_args)
+            except Exception as e:
+                outcome["error"] = f"Error executing {function_name}: {str(e)}"
+        return outcome
+
+    @staticmethod
+    def _assemble_tool_calls(tool_call_parts: Dict[int, Dict[str, Any]]) -> List[ChatCompletionMessageToolCall]:
+        """Rebuild complete tool calls from streamed deltas, keyed by their index in the message"""
+        return [
+            ChatCompletionMessageToolCall(
+                id=part["id"],
+                type="function",
+                function=Function(name=part["name"], arguments="".join(part["arguments"])),
+            )
+            for _, part in sorted(tool_call_parts.items())
+        ]
+
+    @staticmethod
+    def _tool_messages(tool_calls, outcomes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Build tool messages in the order the model issued the calls"""
+        return [
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": outcomes[tool_call.id].get("result", outcomes[tool_call.id].get("error")),
+            }
+            for tool_call in tool_calls
+        ]
+
+    @staticmethod
+    def _responses_tools(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The Responses API takes function tools flat rather than nested under a function key"""
+        return [{"type": "function", **tool["function"]} for tool in tools]
+
+    @staticmethod
+    def _responses_input(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Convert chat-format history into Responses API input items"""
+        items: List[Dict[str, Any]] = []
+        for message in map(serialize_message, messages):
+            if message["role"] == "tool":
+                items.append({
+                    "type": "function_call_output",
+                    "call_id": message["tool_call_id"],
+                    "output": message["content"],
+                })
+                continue
+            if message.get("content"):
+                items.append({"role": message["role"], "content": message["content"]})
+            for tool_call in message.get("tool_calls") or []:
+                items.append({
+                    "type": "function_call",
+                    "call_id": tool_call["id"],
+                    "name": tool_call["function"]["name"],
+                    "arguments": tool_call["function"]["arguments"],
+                })
+        return items
+
+    async def _run_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        outcomes: Dict[str, Dict[str, Any]],
+        iteration: int,
+    ) -> AsyncGenerator[str, None]:
+        """Run one turn's tool calls concurrently, streaming events as each finishes into outcomes"""
+        yield f"data: {json.dumps({'type': 'tool_calls_detected', 'count': len(tool_calls), 'iteration': iteration})}\n\n"
+
+        semaphore = asyncio.Semaphore(TOOL_CALL_CONCURRENCY)
+        pending = []
+        for tool_call in tool_calls:
+            function_args = self._parse_tool_arguments(tool_call)
+            yield f"data: {json.dumps({'type': 'tool_started', 'tool_name': tool_call.function.name, 'input': function_args if function_args is not None else tool_call.function.arguments})}\n\n"
+            pending.append(asyncio.create_task(self._execute_tool_call(tool_call, function_args, semaphore)))
 
-                response = self._client.chat.completions.create(
+        try:
+            for next_completed in asyncio.as_completed(pending):
+                outcome = await next_completed
+                outcomes[outcome["tool_call_id"]] = outcome
+                if "error" in outcome:
+                    yield f"data: {json.dumps({'type': 'tool_error', 'tool_name': outcome['function'], 'error': outcome['error']})}\n\n"
+                else:
+                    yield f"data: {json.dumps({'type': 'tool_completed', 'tool_name': outcome['function'], 'output': outcome['result']})}\n\n"
+        finally:
+            # Client disconnects close the generator mid-turn; don't leave sibling calls running
+            for task in pending:
+                task.cancel()
+
+    async def _stream_with_chat_completions(self, prompt: str, conversation: Conversation) -> AsyncGenerator[str, None]:
+        """Chat Completions is stateless, so each iteration re-sends the (compacted) history"""
+        tools = self._tool_registry.get_tool_schemas()
+
+        messages = [
+            {"role": "system", "content": ToolCallingPrompts.get_system_prompt()},
+            *conversation.messages,
+            {"role": "user", "content": prompt}
+        ]
+        turn_start = len(messages) - 1
+
+        context = self._context_manager.create_window()
+
+        # Sequential tool chaining loop
+        max_iterations = 10
+        iteration = 0
+
+        while iteration < max_iterations:
+            iteration += 1
+            request_messages = context.fit(messages)
+
+            # Only opening the stream is retried; once deltas have been forwarded we can't replay them
+            stream = await self._retry_service.run_async(
+                lambda: self._timed_create(
+                    self._client.chat.completions.create,
+                    "tool-calling:execute-stream",
                     model="gpt-5",
-                    messages=messages,
+                    messages=request_messages,
                     tools=tools,
-                    tool_choice="auto"
-                )
-
-                assistant_message = response.choices[0].message
-                messages.append({
-                    "role": "assistant",
-                    "content": assistant_message.content,
-                    "tool_calls": assistant_message.tool_calls
-                })
-
-                # If no tool calls, we're done
-                if not assistant_message.tool_calls:
-                    final_content = assistant_message.content or "Task completed"
-                    yield f"data: {json.dumps({'type': 'final_result', 'message': final_content})}\n\n"
-                    break
-
-                # Process tool calls
-                yield f"data: {json.dumps({'type': 'tool_calls_detected', 'count': len(assistant_message.tool_calls), 'iteration': iteration})}\n\n"
-
-                for tool_call in assistant_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-
-                    yield f"data: {json.dumps({'type': 'tool_started', 'tool_name': function_name, 'input': function_args})}\n\n"
-
-                    try:
-                        result = self._tool_registry.call_function(function_name, **function_args)
-                        yield f"data: {json.dumps({'type': 'tool_completed', 'tool_name': function_name, 'output': result})}\n\n"
-
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": result
-                        })
-                    except Exception as e:
-                        error_msg = f"Error executing {function_name}: {str(e)}"
-                        yield f"data: {json.dumps({'type': 'tool_error', 'tool_name': function_name, 'error': error_msg})}\n\n"
+                    tool_choice="auto",
+                    stream=True,
+                    stream_options={"include_usage": True}
+                ),
+                deadline_seconds=OPENAI_REQUEST_DEADLINE_SECONDS,
+            )
+
+            # Content is forwarded as it arrives; tool call deltas only make sense once complete
+            content_parts: List[str] = []
+            tool_call_parts: Dict[int, Dict[str, Any]] = {}
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    self._prompt_cache_stats.record("tool-calling:execute-stream", chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield f"data: {json.dumps({'type': 'content_delta', 'delta': delta.content, 'iteration': iteration})}\n\n"
+
+                for tool_call_delta in delta.tool_calls or []:
+                    part = tool_call_parts.setdefault(
+                        tool_call_delta.index, {"id": None, "name": "", "arguments": []}
+                    )
+                    if tool_call_delta.id:
+                        part["id"] = tool_call_delta.id
+                    if tool_call_delta.function:
+                        if tool_call_delta.function.name:
+                            part["name"] += tool_call_delta.function.name
+                        if tool_call_delta.function.arguments:
+                            part["arguments"].append(tool_call_delta.function.arguments)
+
+            content = "".join(content_parts) or None
+            tool_calls = self._assemble_tool_calls(tool_call_parts)
+            messages.append({
+                "role": "assistant",
+                "content": content,
+                "tool_calls": tool_calls or None
+            })
+
+            # If no tool calls, we're done
+            if not tool_calls:
+                final_content = content or "Task completed"
+                yield f"data: {json.dumps({'type': 'final_result', 'message': final_content})}\n\n"
+                break
+
+            outcomes: Dict[str, Dict[str, Any]] = {}
+            async with aclosing(self._run_tool_calls(tool_calls, outcomes, iteration)) as events:
+                async for event in events:
+                    yield event
+
+            messages.extend(self._tool_messages(tool_calls, outcomes))
+
+        # If we hit max iterations, return what we have
+        if iteration >= max_iterations:
+            yield f"data: {json.dumps({'type': 'max_iterations_reached', 'message': 'Reached maximum iterations limit'})}\n\n"
+
+        await self._conversations.append_turn(conversation.id, messages[turn_start:])
+        yield f"data: {json.dumps({'type': 'context_usage', **context.get_stats()})}\n\n"
+
+    async def _stream_with_responses_api(self, prompt: str, conversation: Conversation) -> AsyncGenerator[str, None]:
+        """The provider keeps the history, so each request only carries what is new since the last response"""
+        tools = self._responses_tools(self._tool_registry.get_tool_schemas())
+        turn_messages: List[Dict[str, Any]] = [{"role": "user", "content": prompt}]
+
+        previous_response_id = conversation.previous_response_id
+        if previous_response_id:
+            input_items = self._responses_input(turn_messages)
+        else:
+            input_items = self._responses_input(conversation.messages + turn_messages)
+        input_items_sent = 0
+
+        max_iterations = 10
+        iteration = 0
+
+        while iteration < max_iterations:
+            iteration += 1
+            input_items_sent += len(input_items)
+
+            request_options: Dict[str, Any] = {"tools": tools}
+            if previous_response_id:
+                request_options["previous_response_id"] = previous_response_id
+
+            stream = await self._retry_service.run_async(
+                lambda: self._timed_create(
+                    self._client.responses.create,
+                    "tool-calling:execute-stream",
+                    model="gpt-5",
+                    instructions=ToolCallingPrompts.get_system_prompt(),
+                    input=input_items,
+                    stream=True,
+                    **request_options
+                ),
+                deadline_seconds=OPENAI_REQUEST_DEADLINE_SECONDS,
+            )
+
+            content_parts: List[str] = []
+            tool_calls: List[ChatCompletionMessageToolCall] = []
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    content_parts.append(event.delta)
+                    yield f"data: {json.dumps({'type': 'content_delta', 'delta': event.delta, 'iteration': iteration})}\n\n"
+                elif event.type == "response.output_item.done" and event.item.type == "function_call":
+                    tool_calls.append(ChatCompletionMessageToolCall(
+                        id=event.item.call_id,
+                        type="function",
+                        function=Function(name=event.item.name, arguments=event.item.arguments),
+                    ))
+                elif event.type == "response.completed":
+                    previous_response_id = event.response.id
+                    self._prompt_cache_stats.record("tool-calling:execute-stream", event.response.usage)
+                elif event.type == "response.failed":
+                    raise RuntimeError(f"Response failed: {event.response.error}")
+                elif event.type == "error":
+                    raise RuntimeError(event.message)
+
+            content = "".join(content_parts) or None
+            turn_messages.append({"role": "assistant", "content": content, "tool_calls": tool_calls or None})
+
+            if not tool_calls:
+                final_content = content or "Task completed"
+                yield f"data: {json.dumps({'type': 'final_result', 'message': final_content})}\n\n"
+                break
+
+            outcomes: Dict[str, Dict[str, Any]] = {}
+            async with aclosing(self._run_tool_calls(tool_calls, outcomes, iteration)) as events:
+                async for event in events:
+                    yield event
+
+            tool_messages = self._tool_messages(tool_calls, outcomes)
+            turn_messages.extend(tool_messages)
+            input_items = self._responses_input(tool_messages)
+
+        if iteration >= max_iterations:
+            yield f"data: {json.dumps({'type': 'max_iterations_reached', 'message': 'Reached maximum iterations limit'})}\n\n"
+
+        await self._conversations.append_turn(conversation.id, turn_messages, previous_response_id)
+        yield f"data: {json.dumps({'type': 'context_usage', 'input_items_sent': input_items_sent, 'previous_response_id': previous_response_id})}\n\n"
+
+    async def execute_with_streaming(self, prompt: str, conversation_id: Optional[str] = None) -> AsyncGenerator[str, None]:
+        """Execute tool calling with streaming responses, continuing the conversation if an ID is given"""
+        try:
+            if conversation_id:
+                conversation = await self._conversations.load(conversation_id)
+            else:
+                conversation = Conversation(id=self._conversations.new_id())
 
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": error_msg
-                        })
+            yield f"data: {json.dumps({'type': 'started', 'message': 'Tool calling execution started', 'conversation_id': conversation.id})}\n\n"
 
-            # If we hit max iterations, return what we have
-            if iteration >= max_iterations:
-                yield f"data: {json.dumps({'type': 'max_iterations_reached', 'message': 'Reached maximum iterations limit'})}\n\n"
+            if TOOL_CALLING_RESPONSES_API:
+                stream = self._stream_with_responses_api(prompt, conversation)
+            else:
+                stream = self._stream_with_chat_completions(prompt, conversation)
+            async with aclosing(stream) as events:
+                async for event in events:
+                    yield event
 
         except Exception as e:
             error_message = f"Error executing tool calling: {str(e)}"
             yield f"data: {json.dumps({'type': 'error', 'message': error_message})}\n\n"
 
-    def execute_sync(self, prompt: str) -> Dict[str, Any]:
-        """Synchronous execution with tool chaining"""
+    async def execute(self, prompt: str, conversation_id: Optional[str] = None) -> Dict[str, Any]:
+        """Non-streaming execution with tool chaining, continuing the conversation if an ID is given"""
         try:
             tools = self._tool_registry.get_tool_schemas()
+            if conversation_id:
+                conversation = await self._conversations.load(conversation_id)
+            else:
+                conversation = Conversation(id=self._conversations.new_id())
 
             messages = [
-                {"role": "system", "content": "You are a helpful assistant that can manage emails, Github, and Google Docs. When given multi-step tasks, execute them step by step using available tools. Always complete the entire requested task."},
+                {"role": "system", "content": ToolCallingPrompts.get_system_prompt()},
+                *conversation.messages,
                 {"role": "user", "content": prompt}
             ]
+            turn_start = len(messages) - 1
 
+            context = self._context_manager.create_window()
             tool_results = []
             max_iterations = 10
             iteration = 0
 
             while iteration < max_iterations:
                 iteration += 1
-
-                response = self._client.chat.completions.create(
-                    model="gpt-4-1106-preview",
-                    messages=messages,
-                    tools=tools,
-                    tool_choice="auto"
+                request_messages = context.fit(messages)
+
+                response = await self._retry_service.run_async(
+                    lambda: self._timed_create(
+                        self._client.chat.completions.create,
+                        "tool-calling:execute",
+                        model="gpt-4-1106-preview",
+                        messages=request_messages,
+                        tools=tools,
+                        tool_choice="auto"
+                    ),
+                    deadline_seconds=OPENAI_REQUEST_DEADLINE_SECONDS,
                 )
 
+                self._prompt_cache_stats.record("tool-calling:execute", response.usage)
                 assistant_message = response.choices[0].message
                 messages.append({
                     "role": "assistant",
@@ -125,39 +395,27 @@ class NativeToolCallingService:
                     final_content = assistant_message.content or "Task completed"
                     break
 
-                # Process tool calls
-                for tool_call in assistant_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-
-                    try:
-                        result = self._tool_registry.call_function(function_name, **function_args)
-                        tool_results.append({
-                            "function": function_name,
-                            "arguments": function_args,
-                            "result": result,
-                            "iteration": iteration
-                        })
-
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": result
-                        })
-                    except Exception as e:
-                        error_msg = f"Error executing {function_name}: {str(e)}"
-                        tool_results.append({
-                            "function": function_name,
-                            "arguments": function_args,
-                            "error": error_msg,
-                            "iteration": iteration
-                        })
-
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": error_msg
-                        })
+                # Process tool calls concurrently; gather preserves the original call order
+                semaphore = asyncio.Semaphore(TOOL_CALL_CONCURRENCY)
+                outcomes_in_order = await asyncio.gather(*(
+                    self._execute_tool_call(tool_call, self._parse_tool_arguments(tool_call), semaphore)
+                    for tool_call in assistant_message.tool_calls
+                ))
+
+                for outcome in outcomes_in_order:
+                    tool_result = {
+                        "function": outcome["function"],
+                        "arguments": outcome["arguments"],
+                        "iteration": iteration
+                    }
+                    if "error" in outcome:
+                        tool_result["error"] = outcome["error"]
+                    else:
+                        tool_result["result"] = outcome["result"]
+                    tool_results.append(tool_result)
+
+                outcomes = {outcome["tool_call_id"]: outcome for outcome in outcomes_in_order}
+                messages.extend(self._tool_messages(assistant_message.tool_calls, outcomes))
 
             # If we didn't break early, we might have hit max iterations
             if iteration >= max_iterations:
@@ -165,10 +423,13 @@ class NativeToolCallingService:
             elif 'final_content' not in locals():
                 final_content = "Task completed"
 
+            await self._conversations.append_turn(conversation.id, messages[turn_start:])
             return {
                 "success": True,
+                "conversation_id": conversation.id,
                 "message": final_content,
-                "tool_calls": tool_results
+                "tool_calls": tool_results,
+                "context": context.get_stats()
             }
 
         except Exception as e:
@@ -179,4 +440,4 @@ class NativeToolCallingService:
             }
 
 
-service = NativeToolCallingService()
\ No newline at end of file
+service = NativeToolCallingService()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import NUDGE_POOL_FAILURE_BACKOFF_SECONDS, NUDGE_POOL_MAX_INTENTS, NUDGE_POOL_SIZE
+from constants.prompts import TaskTrackingPrompts
+from services.agent_personality_manager import service as agent_personality_service
+from services.metrics_service import service as metrics_service
+from services.openai_inference import service as openai_service
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, str]
+
+
+def parse_nudge_batch(raw: str) -> List[str]:
+    """Parse a batched generation response into distinct nudges, tolerating non-JSON line lists"""
+    text = raw.strip()
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = [line.strip(" -*\t\"") for line in text.splitlines()]
+
+    if not isinstance(parsed, list):
+        return []
+
+    nudges: List[str] = []
+    for item in parsed:
+        if isinstance(item, str) and item.strip() and item.strip() not in nudges:
+            nudges.append(item.strip())
+    return nudges
+
+
+class _NudgePool:
+    def __init__(self, nudges: List[str]) -> None:
+        self.nudges = nudges
+        self.next_index = 0
+
+    @property
+    def remaining(self) -> int:
+        return len(self.nudges) - self.next_index
+
+    def peek(self) -> str:
+        # Once every nudge has been served we cycle rather than block on a refill
+        return self.nudges[self.next_index % len(self.nudges)]
+
+    def take(self) -> str:
+        nudge = self.peek()
+        self.next_index += 1
+        return nudge
+
+
+class NudgePoolService:
+    def __init__(
+        self,
+        pool_size: int = NUDGE_POOL_SIZE,
+        max_intents: int = NUDGE_POOL_MAX_INTENTS,
+        failure_backoff_seconds: float = NUDGE_POOL_FAILURE_BACKOFF_SECONDS,
+    ) -> None:
+        self._openai_service = openai_service
+        self._metrics = metrics_service
+        self._pool_size = pool_size
+        self._max_intents = max_intents
+        self._failure_backoff_seconds = failure_backoff_seconds
+        self._low_watermark = max(1, pool_size // 4)
+        self._pools: "OrderedDict[PoolKey, _NudgePool]" = OrderedDict()
+        self._refills: Dict[PoolKey, asyncio.Task] = {}
+        # Keys whose last refill failed, mapped to when another attempt is allowed
+        self._backoff_until: "OrderedDict[PoolKey, float]" = OrderedDict()
+        self._generation = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "fallbacks": 0,
+            "refills": 0,
+            "refill_failures": 0,
+            "refills_skipped": 0,
+        }
+        agent_personality_service.add_listener(lambda _: self.invalidate())
+
+    async def _generate(self, key: PoolKey, generation: int) -> None:
+        intent, agent_personality = key
+        self._stats["refills"] += 1
+        try:
+            raw = await self._openai_service.inference_async(
+                context=agent_personality,
+                prompt=TaskTrackingPrompts.get_nudge_batch_generation_prompt(
+                    intent, agent_personality, self._pool_size
+                ),
+                image_base64=None,
+                messages=None,
+                endpoint="track-task:nudge"
+            )
+            nudges = parse_nudge_batch(raw or "")
+        except Exception as e:
+            logger.warning("Nudge pool refill failed for intent %r: %s", intent, e)
+            nudges = []
+        finally:
+            self._refills.pop(key, None)
+
+        if not nudges:
+            self._stats["refill_failures"] += 1
+            self._backoff_until[key] = time.monotonic() + self._failure_backoff_seconds
+            self._backoff_until.move_to_end(key)
+            while len(self._backoff_until) > self._max_intents:
+                self._backoff_until.popitem(last=False)
+            return
+        self._backoff_until.pop(key, None)
+        if generation != self._generation:
+            return
+
+        previous = self._pools.get(key)
+        if previous is not None:
+            served = set(previous.nudges[:previous.next_index])
+            nudges = [nudge for nudge in nudges if nudge not in served] or nudges
+
+        self._pools[key] = _NudgePool(nudges)
+        self._pools.move_to_end(key)
+        while len(self._pools) > self._max_intents:
+            self._pools.popitem(last=False)
+
+    def _schedule_refill(self, key: PoolKey) -> Optional[asyncio.Task]:
+        """Start a refill unless one is running or the key is backing off after a failed one"""
+        task = self._refills.get(key)
+        if task is not None:
+            return task
+        if self._backoff_until.get(key, 0.0) > time.monotonic():
+            self._stats["refills_skipped"] += 1
+            return None
+        task = asyncio.create_task(self._metrics.detached(self._generate(key, self._generation)))
+        self._refills[key] = task
+        return task
+
+    def is_warm(self, intent: str, agent_personality: str) -> bool:
+        """Whether a nudge for this intent can be served without a model call"""
+        return (intent, agent_personality) in self._pools
+
+    async def get_nudge(self, intent: str, agent_personality: str, consume: bool = True) -> str:
+        """
+        Serve the next pooled nudge, waiting for the first batch only when the pool is cold.
+
+        With consume=False the nudge is only peeked, for callers that may end up not showing it;
+        they call consume() once it is actually served.
+        """
+        key = (intent, agent_personality)
+        pool = self._pools.get(key)
+
+        if pool is None:
+            self._stats["misses"] += 1
+            refill = self._schedule_refill(key)
+            if refill is not None:
+                await asyncio.shield(refill)
+            pool = self._pools.get(key)
+            if pool is None:
+                self._stats["fallbacks"] += 1
+                return TaskTrackingPrompts.get_off_track_nudge()
+        else:
+            self._stats["hits"] += 1
+            self._pools.move_to_end(key)
+
+        if not consume:
+            return pool.peek()
+        return self._take(key, pool)
+
+    def consume(self, intent: str, agent_personality: str) -> None:
+        """Advance past a nudge previously peeked with get_nudge(consume=False)"""
+        key = (intent, agent_personality)
+        pool = self._pools.get(key)
+        if pool is not None:
+            self._take(key, pool)
+
+    def _take(self, key: PoolKey, pool: _NudgePool) -> str:
+        nudge = pool.take()
+        if pool.remaining <= self._low_watermark:
+            self._schedule_refill(key)
+        return nudge
+
+    def invalidate(self) -> None:
+        """Drop every pool, e.g. after the personality changes; in-flight refills are discarded"""
+        self._generation += 1
+        self._pools.clear()
+        self._backoff_until.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["pools"] = len(self._pools)
+        stats["refills_in_flight"] = len(self._refills)
+        return stats
+
+
+service = NudgePoolService()
@@ -1,25 +1,46 @@
-from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
 
-from config import OPENAI_KEY
-from openai import OpenAI, AsyncOpenAI
+from openai import AsyncOpenAI
+
+from config import OPENAI_KEY, OPENAI_REQUEST_DEADLINE_SECONDS
+from services.hedging_service import service as hedging_service
+from services.image_processing_service import DecodedImage, ProcessedImage, service as image_processing_service
+from services.metrics_service import service as metrics_service
+from services.prompt_cache_stats_service import service as prompt_cache_stats_service
+from services.retry_service import service as retry_service
+from services.single_flight_service import service as single_flight_service
+
+MODEL = "gpt-5-nano"
+
+# blake2b hashes roughly 0.5 MB/ms here, so below this a worker-thread hop (~80 us) costs more than it saves
+_INLINE_HASH_MAX_BYTES = 64 * 1024
 
 
 class OpenAIInferenceService:
     def __init__(self) -> None:
         if not OPENAI_KEY:
             raise ValueError("OPENAI_KEY is required")
-        self._client = OpenAI(api_key=OPENAI_KEY)
-        self._async_client = AsyncOpenAI(api_key=OPENAI_KEY)
-
-    def inference(
-        self,
+        # Retries are owned by retry_service so they respect the shared budget and deadlines
+        self._async_client = AsyncOpenAI(api_key=OPENAI_KEY, max_retries=0)
+        self._image_processing = image_processing_service
+        self._prompt_cache_stats = prompt_cache_stats_service
+        self._retry_service = retry_service
+        self._hedging = hedging_service
+        self._single_flight = single_flight_service
+        self._metrics = metrics_service
+
+    @staticmethod
+    def _assemble_messages(
         *,
         context: str,
         prompt: str,
-        image_base64: str,
-        messages: Optional[List[Dict[str, str]]] = None,
-    ) -> str:
-        assembled_messages: List[Dict[str, object]] = [
+        image: Optional[ProcessedImage],
+        messages: Optional[List[Dict[str, str]]],
+    ) -> List[Dict[str, Any]]:
+        assembled_messages: List[Dict[str, Any]] = [
             {"role": "system", "content": context}
         ]
 
@@ -32,26 +53,37 @@ class OpenAIInferenceService:
                     }
                 )
 
-        user_content = []
-        user_content.append({"type": "text", "text": prompt})
-        if image_base64:
-            clean_base64 = image_base64.strip()
-            if clean_base64.startswith("data:"):
-                clean_base64 = clean_base64.split(",", 1)[-1]
-            clean_base64 = clean_base64.replace(" ", "").replace("\n", "").replace("\r", "")
-
-            user_content.append({
-                "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{clean_base64}"}
-            })
+        user_content: List[Dict[str, Any]] = [{"type": "text", "text": prompt}]
+        if image is not None:
+            user_content.append(image.to_image_url_part())
 
         assembled_messages.append({"role": "user", "content": user_content})
+        return assembled_messages
 
-        response = self._client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=assembled_messages
-        )
-        return response.choices[0].message.content
+    @staticmethod
+    def _request_key(
+        *,
+        context: str,
+        prompt: str,
+        image_base64: Optional[str],
+        image_bytes: Optional[bytes],
+        messages: Optional[List[Dict[str, str]]],
+        response_format: Optional[Dict[str, Any]],
+        endpoint: str,
+        hedge: bool,
+    ) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        # endpoint and hedge are part of the key so stats stay attributed to the right caller and a
+        # non-hedged call never silently rides on a hedged flight
+        header = json.dumps([MODEL, context, prompt, messages, response_format, endpoint, hedge], sort_keys=True)
+        digest.update(header.encode("utf-8"))
+        if image_bytes:
+            digest.update(b"bytes:")
+            digest.update(image_bytes)
+        elif image_base64:
+            digest.update(b"base64:")
+            digest.update(image_base64.encode("ascii", "ignore"))
+        return digest.hexdigest()
 
     async def inference_async(
         self,
@@ -59,41 +91,67 @@ class OpenAIInferenceService:
         context: str,
         prompt: str,
         image_base64: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
+        decoded_image: Optional[DecodedImage] = None,
         messages: Optional[List[Dict[str, str]]] = None,
+        endpoint: str = "inference",
+        hedge: bool = False,
+        response_format: Optional[Dict[str, Any]] = None,
     ) -> str:
-        assembled_messages: List[Dict[str, object]] = [
-            {"role": "system", "content": context}
-        ]
-
-        if messages:
-            for message in messages:
-                assembled_messages.append(
-                    {
-                        "role": message["role"],
-                        "content": message["content"],
-                    }
-                )
-
-        user_content = []
-        user_content.append({"type": "text", "text": prompt})
-        if image_base64:
-            clean_base64 = image_base64.strip()
-            if clean_base64.startswith("data:"):
-                clean_base64 = clean_base64.split(",", 1)[-1]
-            clean_base64 = clean_base64.replace(" ", "").replace("\n", "").replace("\r", "")
-
-            user_content.append({
-                "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{clean_base64}"}
-            })
-
-        assembled_messages.append({"role": "user", "content": user_content})
-
-        response = await self._async_client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=assembled_messages
+        request_key_args = dict(
+            context=context,
+            prompt=prompt,
+            image_base64=image_base64,
+            image_bytes=image_bytes,
+            messages=messages,
+            response_format=response_format,
+            endpoint=endpoint,
+            hedge=hedge,
         )
-        return response.choices[0].message.content
+        if len(image_bytes or image_base64 or "") > _INLINE_HASH_MAX_BYTES:
+            # Hashing a full screenshot is cheap but not free; keep it off the event loop
+            key = await asyncio.to_thread(self._request_key, **request_key_args)
+        else:
+            key = self._request_key(**request_key_args)
+
+        async def shared_request() -> str:
+            with self._metrics.span("preprocess"):
+                if decoded_image is not None:
+                    image = await self._image_processing.prepare_decoded_async(decoded_image)
+                elif image_bytes:
+                    image = await self._image_processing.prepare_async(image_bytes)
+                elif image_base64:
+                    image = await self._image_processing.process_base64_async(image_base64)
+                else:
+                    image = None
+            assembled_messages = self._assemble_messages(
+                context=context, prompt=prompt, image=image, messages=messages
+            )
+
+            request_options: Dict[str, Any] = {}
+            if response_format is not None:
+                request_options["response_format"] = response_format
+
+            async def create():
+                with self._metrics.openai_call(MODEL, endpoint):
+                    return await self._async_client.chat.completions.create(
+                        model=MODEL,
+                        messages=assembled_messages,
+                        **request_options
+                    )
+
+            def operation():
+                return self._retry_service.run_async(create, deadline_seconds=OPENAI_REQUEST_DEADLINE_SECONDS)
+
+            if hedge:
+                response = await self._hedging.run(operation)
+            else:
+                response = await operation()
+            self._prompt_cache_stats.record(endpoint, response.usage)
+            return response.choices[0].message.content
+
+        # Identical concurrent requests (client retries, several overlays polling) share one call
+        return await self._single_flight.run(key, shared_request)
 
 
 service = OpenAIInferenceService()
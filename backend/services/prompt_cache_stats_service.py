@@ -0,0 +1,44 @@
+import threading
+from typing import Any, Dict
+
+
+class PromptCacheStatsService:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, usage: Any) -> None:
+        """Record prompt and cached-prefix token counts from an OpenAI usage object"""
+        if usage is None:
+            return
+
+        # Chat Completions reports prompt_tokens; the Responses API reports input_tokens
+        details = getattr(usage, "prompt_tokens_details", None) or getattr(usage, "input_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", None) or 0
+
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "cache_hits": 0}
+            )
+            stats["requests"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+            if cached_tokens:
+                stats["cache_hits"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                endpoint: {
+                    **stats,
+                    "cached_token_ratio": (
+                        stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+                    ),
+                    "hit_rate": stats["cache_hits"] / stats["requests"] if stats["requests"] else 0.0,
+                }
+                for endpoint, stats in self._endpoints.items()
+            }
+
+
+service = PromptCacheStatsService()
@@ -1,12 +1,231 @@
+import asyncio
+import datetime
+import email.utils
 import json
-from typing import Any, Callable, Dict, Optional, TypeVar, Union
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+from config import (
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_BUDGET_MIN_PER_SECOND,
+    RETRY_BUDGET_RATIO,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY_SECONDS,
+)
+from models.core import TaskAnalysis
+from services.metrics_service import service as metrics_service
 
 T = TypeVar('T')
 
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RetryBudgetExhausted(Exception):
+    pass
+
+
+class RetryBudget:
+    """Token bucket shared by the whole process: every first attempt deposits ratio tokens, every
+    retry withdraws one, so retries stay a bounded fraction of traffic during an outage"""
+
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float = 10.0) -> None:
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._max_tokens, self._tokens + (now - self._updated_at) * self._min_per_second)
+        self._updated_at = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+def default_is_retryable(error: Exception) -> bool:
+    """Retry timeouts, connection failures and 408/409/429/5xx responses"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code is not None:
+        return status_code in _RETRYABLE_STATUS_CODES
+    # Client libraries (openai, httpx) name their transport errors this way
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read Retry-After (seconds or HTTP date) or retry-after-ms from an error's response headers"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    # A malformed date must not replace the upstream error being retried
+    try:
+        parsed = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, parsed.timestamp() - time.time())
+
 
 class RetryService:
-    def __init__(self, max_retries: int = 3) -> None:
-        self.max_retries = max_retries
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay_seconds: float = RETRY_BASE_DELAY_SECONDS,
+        max_delay_seconds: float = RETRY_MAX_DELAY_SECONDS,
+        budget: Optional[RetryBudget] = None,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self._base_delay_seconds = base_delay_seconds
+        self._max_delay_seconds = max_delay_seconds
+        self._budget = budget or RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_PER_SECOND)
+        self._stats = {
+            "operations": 0,
+            "retries": 0,
+            "succeeded_after_retry": 0,
+            "budget_exhausted": 0,
+            "deadline_exceeded": 0,
+            "failed": 0,
+        }
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter keeps synchronized clients from retrying in lockstep
+        return random.uniform(0, min(self._max_delay_seconds, self._base_delay_seconds * (2 ** attempt)))
+
+    async def run_async(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        *,
+        deadline_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        is_retryable: Callable[[Exception], bool] = default_is_retryable,
+    ) -> T:
+        """
+        Run an async operation, retrying transient failures with exponential backoff and jitter.
+
+        Retry-After hints from the server take precedence over the computed backoff. Each attempt
+        is bounded by what remains of deadline_seconds, and every retry must be paid for from the
+        process-wide retry budget; the last error is re-raised when either runs out.
+        """
+        attempts = max_attempts or self.max_attempts
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self._stats["operations"] += 1
+        self._budget.deposit()
+
+        for attempt in range(attempts):
+            try:
+                if deadline is None:
+                    result = await operation()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError("Request deadline exceeded")
+                    result = await asyncio.wait_for(operation(), timeout=remaining)
+                if attempt:
+                    self._stats["succeeded_after_retry"] += 1
+                return result
+            except Exception as e:
+                if attempt + 1 >= attempts or not is_retryable(e):
+                    self._stats["failed"] += 1
+                    raise
+
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    self._stats["deadline_exceeded"] += 1
+                    raise
+                if not self._budget.try_withdraw():
+                    self._stats["budget_exhausted"] += 1
+                    raise
+
+                self._stats["retries"] += 1
+                logger.info("Retrying after %s (attempt %d, waiting %.2fs)", type(e).__name__, attempt + 1, delay)
+                await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")
+
+    async def retry_with_schema_validation_async(
+        self,
+        operation: Callable[[], Awaitable[str]],
+        validator: Callable[[str], Dict[str, Any]],
+        fallback_result: Dict[str, Any],
+        *,
+        max_attempts: int = 2,
+    ) -> Dict[str, Any]:
+        """
+        Re-run an operation whose output fails validation, drawing on the shared retry budget.
+
+        Args:
+            operation: Coroutine factory returning the raw model output
+            validator: Parses and validates the output, raising ValueError when it is invalid
+            fallback_result: Result to return, annotated with the last error, if every attempt fails
+
+        Returns:
+            Validated dict or fallback_result
+        """
+        last_error: Optional[str] = None
+
+        for attempt in range(max_attempts):
+            if attempt and not self._budget.try_withdraw():
+                self._stats["budget_exhausted"] += 1
+                break
+            try:
+                raw = await operation()
+                with metrics_service.span("validate"):
+                    return validator(raw)
+            except ValueError as e:
+                last_error = f"Schema validation failed: {str(e)}"
+            except Exception as e:
+                last_error = f"Operation failed: {str(e)}"
+                break
+
+        fallback_with_error = fallback_result.copy()
+        if "reasoning" in fallback_with_error:
+            fallback_with_error["reasoning"] = f"{fallback_with_error['reasoning']} (Last error: {last_error})"
+        return fallback_with_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
 
     def retry_with_schema_validation(
         self,
@@ -15,7 +234,7 @@ class RetryService:
         fallback_result: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Retry an operation up to max_retries times until valid schema is returned.
+        Run an operation up to max_attempts times until valid schema is returned.
 
         Args:
             operation: Function that returns a string (expected to be JSON)
@@ -27,7 +246,7 @@ class RetryService:
         """
         last_error: Optional[str] = None
 
-        for attempt in range(self.max_retries):
+        for attempt in range(self.max_attempts):
             try:
                 # Execute the operation
                 result_str = operation()
@@ -58,46 +277,53 @@ class RetryService:
         return fallback_with_error
 
 
-def validate_task_tracking_schema(data: Any) -> Dict[str, Any]:
-    """Validate that the response matches expected task tracking schema and return parsed data."""
-    import json
+def _task_analysis_response_format() -> Dict[str, Any]:
+    schema = TaskAnalysis.model_json_schema()
+    schema.pop("title", None)
+    schema.pop("description", None)
+    for property_schema in schema["properties"].values():
+        property_schema.pop("title", None)
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "task_analysis", "strict": True, "schema": schema},
+    }
 
-    # Handle both string and dict inputs
-    if isinstance(data, str):
-        try:
-            parsed_data = json.loads(data.strip())
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON: {str(e)}")
-    elif isinstance(data, dict):
-        parsed_data = data
-    else:
-        raise ValueError(f"Data must be string or dict, got {type(data)}")
 
-    required_fields = ["status", "confidence", "reasoning"]
-    valid_statuses = ["on_track", "off_track", "unknown"]
+TASK_ANALYSIS_RESPONSE_FORMAT = _task_analysis_response_format()
 
-    # Check required fields exist
-    for field in required_fields:
-        if field not in parsed_data:
-            raise ValueError(f"Missing required field: {field}")
+_task_analysis_adapter = TypeAdapter(TaskAnalysis)
 
-    # Check status is valid
-    if parsed_data["status"] not in valid_statuses:
-        raise ValueError(f"Invalid status: {parsed_data['status']}")
+_FENCED_JSON_PATTERN = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
 
-    # Check confidence is a number between 0 and 1
-    try:
-        confidence = float(parsed_data["confidence"])
-        if not (0.0 <= confidence <= 1.0):
-            raise ValueError(f"Confidence out of range: {confidence}")
-    except (ValueError, TypeError) as e:
-        raise ValueError(f"Invalid confidence value: {str(e)}")
 
-    # Check reasoning is a string
-    if not isinstance(parsed_data["reasoning"], str):
-        raise ValueError(f"Reasoning must be a string")
+def _extract_json_object(text: str) -> Optional[str]:
+    """Recover a JSON object wrapped in a code fence or surrounded by prose"""
+    fenced = _FENCED_JSON_PATTERN.search(text)
+    if fenced:
+        return fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        return text[start:end + 1]
+    return None
+
+
+def validate_task_tracking_schema(data: Any) -> Dict[str, Any]:
+    """Validate that the response matches expected task tracking schema and return parsed data."""
+    if isinstance(data, dict):
+        return _task_analysis_adapter.validate_python(data).model_dump()
+    if not isinstance(data, str):
+        raise ValueError(f"Data must be string or dict, got {type(data)}")
 
-    return parsed_data
+    try:
+        return _task_analysis_adapter.validate_json(data.strip()).model_dump()
+    except ValidationError as e:
+        recovered = _extract_json_object(data)
+        if recovered is None:
+            raise ValueError(f"Invalid task analysis: {e.errors(include_url=False)}")
+        try:
+            return _task_analysis_adapter.validate_json(recovered).model_dump()
+        except ValidationError as recovery_error:
+            raise ValueError(f"Invalid task analysis: {recovery_error.errors(include_url=False)}")
 
 
 service = RetryService()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import time
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from config import (
+    SCREENSHOT_CACHE_ENTRIES_PER_SESSION,
+    SCREENSHOT_CACHE_MAX_DISTANCE,
+    SCREENSHOT_CACHE_TTL_SECONDS,
+)
+from services.session_store_service import service as session_store_service
+
+
+def compute_dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """Compute a 64-bit difference hash of an image"""
+    pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR).tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+_NAMESPACE = "screenshot_cache"
+
+
+class ScreenshotCacheService:
+    """Per-session cache of recent verdicts, kept in the session store so every worker shares it"""
+
+    def __init__(
+        self,
+        max_distance: int = SCREENSHOT_CACHE_MAX_DISTANCE,
+        ttl_seconds: float = SCREENSHOT_CACHE_TTL_SECONDS,
+        entries_per_session: int = SCREENSHOT_CACHE_ENTRIES_PER_SESSION,
+    ) -> None:
+        self._store = session_store_service
+        self._max_distance = max_distance
+        self._ttl_seconds = ttl_seconds
+        self._entries_per_session = entries_per_session
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def hash_image(image: Image.Image) -> int:
+        return compute_dhash(image)
+
+    async def get(self, session_id: str, intent: str, image_hash: int) -> Optional[Dict[str, Any]]:
+        """Return a cached result for a near-identical frame with the same intent"""
+        entries = await self._store.get_async(_NAMESPACE, session_id, [])
+        oldest = time.time() - self._ttl_seconds
+
+        for entry in reversed(entries):
+            if entry["created_at"] < oldest or entry["intent"] != intent:
+                continue
+            if (entry["image_hash"] ^ image_hash).bit_count() <= self._max_distance:
+                self._hits += 1
+                return entry["result"]
+
+        self._misses += 1
+        return None
+
+    async def put(self, session_id: str, intent: str, image_hash: int, result: Dict[str, Any]) -> None:
+        """Store an analysis result for a session, keeping only its newest entries"""
+        entry = {"intent": intent, "image_hash": image_hash, "result": result, "created_at": time.time()}
+        # The whole session expires once its newest entry would have
+        await self._store.append_async(
+            _NAMESPACE, session_id, entry, self._entries_per_session, ttl_seconds=self._ttl_seconds
+        )
+
+    def clear(self) -> None:
+        self._store.clear(_NAMESPACE)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+
+service = ScreenshotCacheService()
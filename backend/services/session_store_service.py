@@ -0,0 +1,330 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import (
+    SESSION_STORE_BACKEND,
+    SESSION_STORE_CACHE_SIZE,
+    SESSION_STORE_CACHE_TTL_SECONDS,
+    SESSION_STORE_MAX_KEYS,
+    SESSION_STORE_PATH,
+)
+
+DEFAULT_SESSION_ID = "default"
+
+StoreKey = Tuple[str, str]
+
+# Expired rows are swept every this many writes rather than on every write
+_PURGE_EVERY_WRITES = 256
+
+
+def _expires_at(ttl_seconds: Optional[float]) -> Optional[float]:
+    return time.time() + ttl_seconds if ttl_seconds is not None else None
+
+
+class InProcessSessionBackend:
+    """Keeps values in this process only; correct for a single worker"""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_keys: int = SESSION_STORE_MAX_KEYS) -> None:
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        # One LRU per namespace, so high-churn data like screenshot verdicts can't evict personalities
+        self._namespaces: "Dict[str, OrderedDict[str, Tuple[str, Optional[float]]]]" = {}
+
+    def _read(self, key: StoreKey) -> Optional[str]:
+        values = self._namespaces.get(key[0])
+        row = values.get(key[1]) if values is not None else None
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            del values[key[1]]
+            return None
+        values.move_to_end(key[1])
+        return value
+
+    def _write(self, key: StoreKey, value: str, ttl_seconds: Optional[float]) -> None:
+        values = self._namespaces.setdefault(key[0], OrderedDict())
+        values[key[1]] = (value, _expires_at(ttl_seconds))
+        values.move_to_end(key[1])
+        while len(values) > self._max_keys:
+            values.popitem(last=False)
+
+    def get(self, key: StoreKey) -> Optional[str]:
+        with self._lock:
+            return self._read(key)
+
+    def set(self, key: StoreKey, value: str, ttl_seconds: Optional[float]) -> None:
+        with self._lock:
+            self._write(key, value, ttl_seconds)
+
+    def update(
+        self, key: StoreKey, fn: Callable[[Optional[str]], str], ttl_seconds: Optional[float]
+    ) -> str:
+        with self._lock:
+            value = fn(self._read(key))
+            self._write(key, value, ttl_seconds)
+            return value
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+
+class SQLiteSessionBackend:
+    """Shares values between worker processes on one host through a WAL-mode SQLite file"""
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str = SESSION_STORE_PATH, max_keys: int = SESSION_STORE_MAX_KEYS) -> None:
+        self._path = path
+        self._max_keys = max_keys
+        self._thread_local = threading.local()
+        self._writes_lock = threading.Lock()
+        self._writes = 0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS session_values ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                "updated_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads; tools and to_thread calls use several
+        connection = getattr(self._thread_local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._thread_local.connection = connection
+        return connection
+
+    def _read(self, connection: sqlite3.Connection, key: StoreKey) -> Optional[str]:
+        row = connection.execute(
+            "SELECT value FROM session_values WHERE namespace = ? AND key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (key[0], key[1], time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _write(
+        self, connection: sqlite3.Connection, key: StoreKey, value: str, ttl_seconds: Optional[float]
+    ) -> None:
+        connection.execute(
+            "INSERT INTO session_values (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET "
+            "value = excluded.value, expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+            (key[0], key[1], value, _expires_at(ttl_seconds), time.time()),
+        )
+        with self._writes_lock:
+            self._writes += 1
+            purge = self._writes % _PURGE_EVERY_WRITES == 0
+        if purge:
+            self._purge(connection)
+
+    def _purge(self, connection: sqlite3.Connection) -> None:
+        """Drop expired rows, then the least recently written rows beyond max_keys in each namespace"""
+        connection.execute("DELETE FROM session_values WHERE expires_at <= ?", (time.time(),))
+        connection.execute(
+            "DELETE FROM session_values WHERE rowid IN ("
+            "SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER "
+            "(PARTITION BY namespace ORDER BY updated_at DESC) AS position FROM session_values) "
+            "WHERE position > ?)",
+            (self._max_keys,),
+        )
+
+    def get(self, key: StoreKey) -> Optional[str]:
+        return self._read(self._connection(), key)
+
+    def set(self, key: StoreKey, value: str, ttl_seconds: Optional[float]) -> None:
+        self._write(self._connection(), key, value, ttl_seconds)
+
+    def update(
+        self, key: StoreKey, fn: Callable[[Optional[str]], str], ttl_seconds: Optional[float]
+    ) -> str:
+        connection = self._connection()
+        # IMMEDIATE takes the write lock up front so concurrent workers can't interleave read-modify-write
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            value = fn(self._read(connection, key))
+            self._write(connection, key, value, ttl_seconds)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return value
+
+    def clear(self, namespace: str) -> None:
+        self._connection().execute("DELETE FROM session_values WHERE namespace = ?", (namespace,))
+
+
+class SessionStoreService:
+    """
+    JSON key-value store for per-session state, with a short read-through cache in each worker.
+
+    Writes go straight to the backend and refresh this worker's cache, so a worker always sees
+    its own writes; writes from other workers become visible once the cached copy expires.
+
+    Async code should use the *_async methods: they run a blocking backend (SQLite) in a worker
+    thread so its I/O and lock waits never stall the event loop, and call the in-memory one inline.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        cache_ttl_seconds: float = SESSION_STORE_CACHE_TTL_SECONDS,
+        cache_size: int = SESSION_STORE_CACHE_SIZE,
+    ) -> None:
+        self._backend = backend
+        self._cache_ttl_seconds = cache_ttl_seconds
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[StoreKey, Tuple[Optional[str], float]]" = OrderedDict()
+        self._stats = {"cache_hits": 0, "cache_misses": 0, "writes": 0}
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _remember(self, key: StoreKey, raw: Optional[str], written: bool = False) -> None:
+        with self._lock:
+            self._cache[key] = (raw, time.monotonic() + self._cache_ttl_seconds)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            if written:
+                self._stats["writes"] += 1
+
+    def _cached(self, key: StoreKey) -> Tuple[bool, Optional[str]]:
+        with self._lock:
+            cached = self._cache.get(key)
+            fresh = cached is not None and cached[1] > time.monotonic()
+            self._stats["cache_hits" if fresh else "cache_misses"] += 1
+        return fresh, cached[0] if fresh else None
+
+    def _read_through(self, key: StoreKey) -> Optional[str]:
+        raw = self._backend.get(key)
+        self._remember(key, raw)
+        return raw
+
+    def _write(self, key: StoreKey, raw: str, ttl_seconds: Optional[float]) -> None:
+        self._backend.set(key, raw, ttl_seconds)
+        self._remember(key, raw, written=True)
+
+    def _update(
+        self, key: StoreKey, fn: Callable[[Any], Any], default: Any, ttl_seconds: Optional[float]
+    ) -> Any:
+        def apply(raw: Optional[str]) -> str:
+            return json.dumps(fn(json.loads(raw) if raw is not None else default))
+
+        raw = self._backend.update(key, apply, ttl_seconds)
+        self._remember(key, raw, written=True)
+        return json.loads(raw)
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        fresh, raw = self._cached((namespace, key))
+        if not fresh:
+            raw = self._read_through((namespace, key))
+        return json.loads(raw) if raw is not None else default
+
+    async def get_async(self, namespace: str, key: str, default: Any = None) -> Any:
+        fresh, raw = self._cached((namespace, key))
+        if not fresh:
+            raw = await self._run(self._read_through, (namespace, key))
+        return json.loads(raw) if raw is not None else default
+
+    async def get_many_async(self, namespace: str, keys: List[str], default: Any = None) -> List[Any]:
+        """Read several keys, with every cache miss fetched in a single backend hop"""
+        raws: Dict[str, Optional[str]] = {}
+        misses: List[StoreKey] = []
+        for key in keys:
+            fresh, raw = self._cached((namespace, key))
+            if fresh:
+                raws[key] = raw
+            else:
+                misses.append((namespace, key))
+        if misses:
+            fetched = await self._run(lambda: [self._read_through(store_key) for store_key in misses])
+            raws.update((store_key[1], raw) for store_key, raw in zip(misses, fetched))
+        return [json.loads(raws[key]) if raws[key] is not None else default for key in keys]
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        self._write((namespace, key), json.dumps(value), ttl_seconds)
+
+    async def set_async(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        await self._run(self._write, (namespace, key), json.dumps(value), ttl_seconds)
+
+    def update(
+        self,
+        namespace: str,
+        key: str,
+        fn: Callable[[Any], Any],
+        default: Any = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """Atomically replace a value with fn(current value) across every worker"""
+        return self._update((namespace, key), fn, default, ttl_seconds)
+
+    async def update_async(
+        self,
+        namespace: str,
+        key: str,
+        fn: Callable[[Any], Any],
+        default: Any = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        return await self._run(self._update, (namespace, key), fn, default, ttl_seconds)
+
+    def append(
+        self,
+        namespace: str,
+        key: str,
+        item: Any,
+        max_items: int,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """Append to a list value, keeping only the newest max_items"""
+        self.update(namespace, key, lambda items: (items + [item])[-max_items:], [], ttl_seconds)
+
+    async def append_async(
+        self,
+        namespace: str,
+        key: str,
+        item: Any,
+        max_items: int,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        await self.update_async(namespace, key, lambda items: (items + [item])[-max_items:], [], ttl_seconds)
+
+    def clear(self, namespace: str) -> None:
+        self._backend.clear(namespace)
+        with self._lock:
+            for store_key in [store_key for store_key in self._cache if store_key[0] == namespace]:
+                del self._cache[store_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["cached_keys"] = len(self._cache)
+        lookups = stats["cache_hits"] + stats["cache_misses"]
+        stats["backend"] = self._backend.name
+        stats["cache_hit_rate"] = stats["cache_hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def _create_backend() -> Any:
+    if SESSION_STORE_BACKEND == "sqlite":
+        return SQLiteSessionBackend()
+    return InProcessSessionBackend()
+
+
+service = SessionStoreService(_create_backend())
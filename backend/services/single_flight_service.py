@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from services.metrics_service import service as metrics_service
+
+T = TypeVar('T')
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlightService:
+    """Coalesces concurrent calls with the same key onto one in-flight task"""
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._metrics = metrics_service
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "abandoned": 0}
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    async def run(self, key: Hashable, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await the in-flight task for key, starting it if there is none.
+
+        A waiter that is cancelled (e.g. its client disconnected) detaches without affecting the
+        others; the shared task is only cancelled once no waiters remain.
+        """
+        self._stats["calls"] += 1
+        flight = self._in_flight.get(key)
+        if flight is None:
+            self._stats["executions"] += 1
+            flight = _Flight(asyncio.ensure_future(self._metrics.detached(operation())))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self._stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self._stats["abandoned"] += 1
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["in_flight"] = len(self._in_flight)
+        return stats
+
+
+service = SingleFlightService()
@@ -1,25 +1,127 @@
 import asyncio
-from typing import Dict, Any
+import binascii
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
+from PIL import Image
+
+from config import (
+    NUDGE_ADAPTIVE_THRESHOLD,
+    NUDGE_ADAPTIVE_WINDOW,
+    NUDGE_POLICY,
+    OPENAI_HEDGE_TRACK_TASK,
+    TRACK_TASK_BATCH_CONCURRENCY,
+)
 from constants.prompts import TaskTrackingPrompts
-from services.openai_inference import service as openai_service
-from services.retry_service import service as retry_service, validate_task_tracking_schema
 from services.agent_personality_manager import service as agent_personality_service
+from services.image_processing_service import DecodedImage, decode_image_base64, service as image_processing_service
+from services.metrics_service import service as metrics_service
+from services.nudge_pool_service import service as nudge_pool_service
+from services.openai_inference import service as openai_service
+from services.retry_service import (
+    TASK_ANALYSIS_RESPONSE_FORMAT,
+    service as retry_service,
+    validate_task_tracking_schema,
+)
+from services.screenshot_cache_service import service as screenshot_cache_service
+from services.session_store_service import DEFAULT_SESSION_ID, service as session_store_service
+
+
+_HISTORY_NAMESPACE = "intent_history"
+# Histories outlive any single focus session but shouldn't pile up in the shared store forever
+_HISTORY_TTL_SECONDS = 24 * 60 * 60
 
 
 class TaskTrackingService:
     def __init__(self) -> None:
         self._openai_service = openai_service
+        self._image_processing = image_processing_service
         self._retry_service = retry_service
+        self._screenshot_cache = screenshot_cache_service
+        self._session_store = session_store_service
+        self._nudge_pool = nudge_pool_service
+        self._metrics = metrics_service
+        self._nudge_policy = NUDGE_POLICY
+        self._nudge_stats = {
+            "speculative_calls": 0,
+            "wasted_calls": 0,
+            "lazy_calls": 0,
+            "lazy_latency_ms_total": 0.0,
+        }
 
-    async def analyze_task_status(self, *, intent: str, image_base64: str) -> Dict[str, Any]:
+    async def get_intent_history(self, session_id: str = DEFAULT_SESSION_ID) -> List[Dict[str, Any]]:
+        """Recent (intent, status) verdicts for a session, oldest first"""
+        return await self._session_store.get_async(_HISTORY_NAMESPACE, session_id, [])
+
+    async def _should_speculate(self, session_id: str) -> bool:
+        if self._nudge_policy == "speculative":
+            return True
+        if self._nudge_policy == "lazy":
+            return False
+
+        verdicts = [entry["status"] == "off_track" for entry in await self.get_intent_history(session_id)]
+        if not verdicts:
+            return False
+        return sum(verdicts) / len(verdicts) > NUDGE_ADAPTIVE_THRESHOLD
+
+    async def _record_verdict(self, session_id: str, intent: str, status: str) -> None:
+        await self._session_store.append_async(
+            _HISTORY_NAMESPACE,
+            session_id,
+            {"intent": intent, "status": status, "at": time.time()},
+            NUDGE_ADAPTIVE_WINDOW,
+            ttl_seconds=_HISTORY_TTL_SECONDS,
+        )
+
+    def get_nudge_stats(self) -> Dict[str, Any]:
+        stats = dict(self._nudge_stats)
+        stats["policy"] = self._nudge_policy
+        stats["wasted_rate"] = (
+            stats["wasted_calls"] / stats["speculative_calls"] if stats["speculative_calls"] else 0.0
+        )
+        stats["lazy_latency_ms_avg"] = (
+            stats["lazy_latency_ms_total"] / stats["lazy_calls"] if stats["lazy_calls"] else 0.0
+        )
+        return stats
+
+    def _decode_and_hash(self, image_bytes: bytes) -> Tuple[Optional[DecodedImage], Optional[int]]:
+        """Decode the screenshot once for both the dHash and the inference preprocessing"""
+        try:
+            decoded = self._image_processing.decode(image_bytes)
+            return decoded, self._screenshot_cache.hash_image(decoded.image)
+        except (ValueError, OSError, Image.DecompressionBombError):
+            return None, None
+
+    async def analyze_task_status(
+        self,
+        *,
+        intent: str,
+        image_base64: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
+        session_id: str = DEFAULT_SESSION_ID,
+    ) -> Dict[str, Any]:
         """
         Analyze if a person is on track with their stated intent based on a screenshot.
 
+        The screenshot can be given either as base64 or as raw bytes; base64 is decoded
+        once here so the cache and the inference call share the same bytes.
+
         Returns:
             Dict with status, confidence, and reasoning
         """
-        if not image_base64:
+        if not image_bytes and image_base64:
+            try:
+                with self._metrics.span("decode"):
+                    image_bytes = await asyncio.to_thread(decode_image_base64, image_base64)
+            except (binascii.Error, ValueError) as e:
+                return {
+                    "status": "unknown",
+                    "confidence": 0.0,
+                    "reasoning": f"Invalid image encoding: {str(e)}",
+                    "nudge": None,
+                }
+
+        if not image_bytes:
             return {
                 "status": "unknown",
                 "confidence": 0.0,
@@ -27,29 +129,63 @@ class TaskTrackingService:
                 "nudge": None,
             }
 
+        with self._metrics.span("dhash"):
+            decoded, image_hash = await asyncio.to_thread(self._decode_and_hash, image_bytes)
+        if image_hash is not None:
+            with self._metrics.span("cache_lookup"):
+                cached = await self._screenshot_cache.get(session_id, intent, image_hash)
+            if cached is not None:
+                # A repeated screenshot is still a verdict the adaptive nudge policy should see
+                await self._record_verdict(session_id, intent, cached["status"])
+                return cached
+
+        fallback_result = {
+            "status": "unknown",
+            "confidence": 0.0,
+            "reasoning": "Failed to get valid response after retries",
+            "nudge": None,
+        }
+
         async def analysis_operation():
-            return await self._openai_service.inference_async(
-                context=TaskTrackingPrompts.get_task_analysis_system_prompt(),
-                prompt=TaskTrackingPrompts.get_task_analysis_user_prompt(intent),
-                image_base64=image_base64,
-                messages=None
-            )
-
-        async def nudge_operation():
-            agent_personality = agent_personality_service.get_personality_description()
-            return await self._openai_service.inference_async(
-                context=agent_personality,
-                prompt=TaskTrackingPrompts.get_nudge_generation_prompt(intent, agent_personality),
-                image_base64=None,
-                messages=None
-            )
+            # Transport errors are retried inside inference_async; this re-asks when the JSON is invalid
+            with self._metrics.span("analysis"):
+                return await self._retry_service.retry_with_schema_validation_async(
+                    lambda: self._openai_service.inference_async(
+                        context=TaskTrackingPrompts.get_task_analysis_system_prompt(),
+                        prompt=TaskTrackingPrompts.get_task_analysis_user_prompt(intent),
+                        image_bytes=image_bytes,
+                        decoded_image=decoded,
+                        messages=None,
+                        endpoint="track-task:analysis",
+                        hedge=OPENAI_HEDGE_TRACK_TASK,
+                        response_format=TASK_ANALYSIS_RESPONSE_FORMAT
+                    ),
+                    validate_task_tracking_schema,
+                    fallback_result,
+                )
+
+        agent_personality = await agent_personality_service.get_personality_description(session_id)
+
+        async def nudge_operation(consume: bool = True):
+            with self._metrics.span("nudge"):
+                return await self._nudge_pool.get_nudge(intent, agent_personality, consume=consume)
 
+        # A warm pool serves nudges without a model call, so the policy only applies while it is cold.
+        # Speculating generates the pool's first batch alongside the analysis and only peeks at it;
+        # otherwise the batch is generated after an off_track verdict, trading latency for fewer calls
+        pool_warm = self._nudge_pool.is_warm(intent, agent_personality)
+        speculate = not pool_warm and await self._should_speculate(session_id)
+        nudge_raw: Any = None
         try:
-            analysis_raw, nudge_raw = await asyncio.gather(
-                analysis_operation(),
-                nudge_operation(),
-                return_exceptions=True
-            )
+            if speculate:
+                self._nudge_stats["speculative_calls"] += 1
+                analysis_raw, nudge_raw = await asyncio.gather(
+                    analysis_operation(),
+                    nudge_operation(consume=False),
+                    return_exceptions=True
+                )
+            else:
+                analysis_raw, = await asyncio.gather(analysis_operation(), return_exceptions=True)
         except Exception as e:
             return {
                 "status": "unknown",
@@ -58,22 +194,28 @@ class TaskTrackingService:
                 "nudge": None,
             }
 
-        fallback_result = {
-            "status": "unknown",
-            "confidence": 0.0,
-            "reasoning": "Failed to get valid response after retries",
-            "nudge": None,
-        }
-
         if isinstance(analysis_raw, Exception):
-            result = fallback_result
+            result = dict(fallback_result)
         else:
-            try:
-                result = validate_task_tracking_schema(analysis_raw)
-            except Exception:
-                result = fallback_result
+            result = analysis_raw
+
+        off_track = result.get("status") == "off_track"
+        if result.get("status") != "unknown":
+            await self._record_verdict(session_id, intent, result["status"])
+
+        if off_track and speculate:
+            self._nudge_pool.consume(intent, agent_personality)
+        elif off_track and pool_warm:
+            nudge_raw, = await asyncio.gather(nudge_operation(), return_exceptions=True)
+        elif off_track:
+            self._nudge_stats["lazy_calls"] += 1
+            started_at = time.perf_counter()
+            nudge_raw, = await asyncio.gather(nudge_operation(), return_exceptions=True)
+            self._nudge_stats["lazy_latency_ms_total"] += (time.perf_counter() - started_at) * 1000
+        elif speculate:
+            self._nudge_stats["wasted_calls"] += 1
 
-        if result.get("status") == "off_track" and not isinstance(nudge_raw, Exception):
+        if off_track and not isinstance(nudge_raw, Exception):
             try:
                 result["nudge"] = nudge_raw.strip()
             except Exception:
@@ -81,7 +223,38 @@ class TaskTrackingService:
         else:
             result["nudge"] = None
 
+        if image_hash is not None and result.get("status") != "unknown":
+            await self._screenshot_cache.put(session_id, intent, image_hash, result)
+
         return result
 
+    async def analyze_task_status_batch(
+        self,
+        items: List[Dict[str, Any]],
+        concurrency: int = TRACK_TASK_BATCH_CONCURRENCY,
+    ) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], Exception]]]:
+        """
+        Run analyze_task_status for each item (its keyword arguments) with bounded concurrency.
+
+        Yields (index, result) in completion order; a failing item yields its exception instead
+        of aborting the batch. Items still running are cancelled if the consumer stops early.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run_item(index: int, item: Dict[str, Any]):
+            async with semaphore:
+                try:
+                    return index, await self.analyze_task_status(**item)
+                except Exception as e:
+                    return index, e
+
+        tasks = [asyncio.create_task(run_item(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
 
 service = TaskTrackingService()
@@ -1,13 +1,123 @@
-import pickle
-import requests
-from typing import List, Dict, Any
-
-from googleapiclient.discovery import build
+import asyncio
+import inspect
+import io
+import json
 import logging
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, get_args, get_origin, get_type_hints
+
+import google_auth_httplib2
+import httplib2
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, MediaIoBaseUpload
+
+from config import GOOGLE_API_ROOT_URL, GOOGLE_TIMEOUT_SECONDS, GOOGLE_TOKEN_PATH, TOOL_DEFAULT_TIMEOUT_SECONDS, TOOL_EXECUTOR_WORKERS
+from services.github_client_service import service as github_client_service
+from services.google_doc_cache_service import (
+    DOCUMENT_TEXT_FIELDS,
+    DRIVE_VERSION_FIELDS,
+    extract_document_text,
+    service as google_doc_cache_service,
+    version_token,
+)
+from services.metrics_service import service as metrics_service
+from services.retry_service import service as retry_service
 
 logging.basicConfig(level=logging.INFO)
-
-from config import GITHUB_TOKEN
+logger = logging.getLogger(__name__)
+
+_DOC_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{25,}$")
+# Google rejects batch HTTP requests with more calls than this
+_BATCH_MAX_CALLS = 100
+_GOOGLE_DOC_MIME_TYPE = "application/vnd.google-apps.document"
+_HTML_PATTERN = re.compile(r"^\s*(<!doctype html|<html|<body|<(p|h[1-6]|ul|ol|table|div)[\s>])", re.IGNORECASE)
+
+_JSON_SCHEMA_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    name: str
+    description: str
+    parameters: Dict[str, Any]
+    method_name: str
+    timeout_seconds: float = TOOL_DEFAULT_TIMEOUT_SECONDS
+    max_concurrency: int = 4
+    read_only: bool = True
+    retries: int = 0
+    param_descriptions: Dict[str, str] = field(default_factory=dict)
+
+
+def _json_schema_for(annotation: Any) -> Dict[str, Any]:
+    origin = get_origin(annotation)
+    if origin is Literal:
+        values = list(get_args(annotation))
+        return {"type": _JSON_SCHEMA_TYPES[type(values[0])], "enum": values}
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (str,)
+        return {"type": "array", "items": _json_schema_for(item_type)}
+    return {"type": _JSON_SCHEMA_TYPES.get(annotation, "string")}
+
+
+def _parameters_schema(method: Callable, param_descriptions: Dict[str, str]) -> Dict[str, Any]:
+    hints = get_type_hints(method)
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+
+    for name, parameter in inspect.signature(method).parameters.items():
+        if name == "self":
+            continue
+        schema = _json_schema_for(hints.get(name, str))
+        if name in param_descriptions:
+            schema["description"] = param_descriptions[name]
+        properties[name] = schema
+        if parameter.default is inspect.Parameter.empty:
+            required.append(name)
+
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def tool(
+    name: Optional[str] = None,
+    *,
+    params: Optional[Dict[str, str]] = None,
+    timeout_seconds: float = TOOL_DEFAULT_TIMEOUT_SECONDS,
+    max_concurrency: int = 4,
+    read_only: bool = True,
+    retries: int = 0,
+) -> Callable[[Callable], Callable]:
+    """Declare a registry method as a model-callable tool; the schema is generated from its signature"""
+    def decorator(method: Callable) -> Callable:
+        param_descriptions = params or {}
+        method._tool_spec = ToolSpec(
+            name=name or method.__name__,
+            description=inspect.getdoc(method) or "",
+            parameters=_parameters_schema(method, param_descriptions),
+            method_name=method.__name__,
+            timeout_seconds=timeout_seconds,
+            max_concurrency=max_concurrency,
+            read_only=read_only,
+            retries=retries if read_only else 0,
+            param_descriptions=param_descriptions,
+        )
+        return method
+    return decorator
+
+
+def _release_from_thread(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore) -> None:
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # The loop has shut down while a hung tool was still running; there is no one left to wait
+        pass
 
 
 class ToolRegistryService:
@@ -16,19 +126,110 @@ class ToolRegistryService:
         self._gmail_service = None
         self._docs_service = None
         self._drive_service = None
+        self._services_ready = False
+        self._build_lock = threading.Lock()
+        self._thread_local = threading.local()
+        self._github = github_client_service
+        self._doc_cache = google_doc_cache_service
+        self._metrics = metrics_service
+        self._retry_service = retry_service
+        self._executor = ThreadPoolExecutor(max_workers=TOOL_EXECUTOR_WORKERS, thread_name_prefix="tool")
+
+        # Dispatch table and schemas are compiled once; the serialized tools prefix is byte-identical on every request
+        self._tools: Dict[str, Tuple[Callable[..., str], ToolSpec]] = {}
+        for attribute in type(self).__dict__.values():
+            spec = getattr(attribute, "_tool_spec", None)
+            if spec is not None:
+                self._tools[spec.name] = (getattr(self, spec.method_name), spec)
+        # Kept serialized so no caller can mutate the shared copy and shift the cached prefix
+        self._tool_schemas_json = json.dumps([
+            {
+                "type": "function",
+                "function": {"name": spec.name, "description": spec.description, "parameters": spec.parameters},
+            }
+            for _, spec in self._tools.values()
+        ])
+        self._semaphores = {name: asyncio.Semaphore(spec.max_concurrency) for name, (_, spec) in self._tools.items()}
 
-    def _load_creds(self, creds_path: str = "token.pickle"):
-        with open(creds_path, "rb") as f:
-            self._creds = pickle.load(f)
+    def _load_creds(self, creds_path: str = GOOGLE_TOKEN_PATH):
+        try:
+            with open(creds_path, "rb") as f:
+                self._creds = pickle.load(f)
+        except FileNotFoundError:
+            # A stand-in server (see benchmarks/) doesn't check credentials
+            if not GOOGLE_API_ROOT_URL:
+                raise
+            self._creds = AnonymousCredentials()
+
+    def _thread_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        # httplib2 connections are not thread-safe, and tools run on a thread pool
+        http = getattr(self._thread_local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self._creds, http=httplib2.Http(timeout=GOOGLE_TIMEOUT_SECONDS)
+            )
+            self._thread_local.http = http
+        return http
+
+    def _request_builder(self, http, *args, **kwargs) -> HttpRequest:
+        return HttpRequest(self._thread_http(), *args, **kwargs)
+
+    def _build_service(self, api: str, version: str):
+        if GOOGLE_API_ROOT_URL:
+            # Rewriting rootUrl redirects regular, upload and batch requests alike
+            document = json.loads(get_static_doc(api, version))
+            document["rootUrl"] = GOOGLE_API_ROOT_URL.rstrip("/") + "/"
+            return build_from_document(
+                document,
+                credentials=self._creds,
+                requestBuilder=self._request_builder,
+            )
+        return build(
+            api,
+            version,
+            credentials=self._creds,
+            requestBuilder=self._request_builder,
+            static_discovery=True,
+            cache_discovery=False,
+        )
 
     def _build_services(self):
-        if not self._creds:
-            self._load_creds()
+        if self._services_ready:
+            return
 
-        self._gmail_service = build("gmail", "v1", credentials=self._creds)
-        self._docs_service = build("docs", "v1", credentials=self._creds)
-        self._drive_service = build("drive", "v3", credentials=self._creds)
+        with self._build_lock:
+            if self._services_ready:
+                return
 
+            started_at = time.perf_counter()
+            if not self._creds:
+                self._load_creds()
+
+            self._gmail_service = self._build_service("gmail", "v1")
+            self._docs_service = self._build_service("docs", "v1")
+            self._drive_service = self._build_service("drive", "v3")
+            self._services_ready = True
+            logger.info("Google API clients built in %.1f ms", (time.perf_counter() - started_at) * 1000)
+
+    def prewarm(self) -> None:
+        """Build the Google API clients ahead of the first tool call"""
+        try:
+            self._build_services()
+        except FileNotFoundError:
+            logger.warning("Skipping Google API prewarm: %s not found", GOOGLE_TOKEN_PATH)
+        except Exception as e:
+            logger.warning("Google API prewarm failed: %s", e)
+
+    async def prewarm_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.prewarm)
+
+    @tool(
+        "send_email",
+        params={"to": "Email recipient", "subject": "Email subject", "message": "Email message content"},
+        read_only=False,
+        max_concurrency=2,
+    )
     def send_gmail(self, to: str, subject: str, message: str) -> str:
         """Send an email via Gmail"""
         import base64
@@ -44,19 +245,41 @@ class ToolRegistryService:
         raw = base64.urlsafe_b64encode(msg.as_bytes())
         raw = raw.decode()
 
-        try:
-            message = self._gmail_service.users().messages().send(
-                userId="me", body={'raw': raw}
-            ).execute()
-            return f"Email sent successfully. Message ID: {message['id']}"
-        except Exception as e:
-            return f"Failed to send email: {str(e)}"
+        message = self._gmail_service.users().messages().send(
+            userId="me", body={'raw': raw}
+        ).execute()
+        return f"Email sent successfully. Message ID: {message['id']}"
 
+    @tool(params={"title": "Document title", "content": "Document content"}, read_only=False, max_concurrency=2)
     def create_google_doc(self, title: str, content: str) -> str:
         """Create a new Google Doc with a given title and content"""
-        if not self._docs_service:
+        if not self._drive_service:
             self._build_services()
 
+        try:
+            web_view_link = self._create_google_doc_by_upload(title, content)
+        except HttpError as e:
+            # Only a rejected upload is known not to have created a doc; after a timeout or a 5xx it
+            # may exist server-side, and creating it again through the Docs API would duplicate it
+            if not 400 <= e.resp.status < 500 or e.resp.status in (408, 429):
+                raise
+            logger.warning("Single-request doc creation failed, falling back to Docs API: %s", e)
+            web_view_link = self._create_google_doc_by_batch_update(title, content)
+        return f"Created doc: {title}\nLink: {web_view_link}"
+
+    def _create_google_doc_by_upload(self, title: str, content: str) -> str:
+        """Create the doc and its content in one Drive upload that converts to a Google Doc"""
+        # HTML content keeps its formatting through Drive's import conversion
+        source_mime_type = "text/html" if _HTML_PATTERN.match(content) else "text/plain"
+        media = MediaIoBaseUpload(io.BytesIO(content.encode("utf-8")), mimetype=source_mime_type)
+        created = self._drive_service.files().create(
+            body={"name": title, "mimeType": _GOOGLE_DOC_MIME_TYPE},
+            media_body=media,
+            fields="id,webViewLink",
+        ).execute()
+        return created["webViewLink"]
+
+    def _create_google_doc_by_batch_update(self, title: str, content: str) -> str:
         doc = self._docs_service.documents().create(body={"title": title}).execute()
         doc_id = doc["documentId"]
 
@@ -64,22 +287,27 @@ class ToolRegistryService:
         self._docs_service.documents().batchUpdate(documentId=doc_id, body={"requests": requests}).execute()
 
         drive_meta = self._drive_service.files().get(fileId=doc_id, fields="webViewLink").execute()
-        return f"Created doc: {title}\nLink: {drive_meta['webViewLink']}"
+        return drive_meta["webViewLink"]
 
+    @tool(params={"doc_id": "Google Doc document ID"}, retries=1)
     def read_google_doc_by_id(self, doc_id: str) -> str:
         """Read the text content of a Google Doc by its documentId"""
         if not self._docs_service:
             self._build_services()
 
-        doc = self._docs_service.documents().get(documentId=doc_id).execute()
-        content = []
-        for element in doc.get("body", {}).get("content", []):
-            if "paragraph" in element:
-                for elem in element["paragraph"]["elements"]:
-                    if "textRun" in elem:
-                        content.append(elem["textRun"]["content"])
-        return "".join(content).strip()
+        # The metadata call is far cheaper than the document body, so it gates the heavy fetch
+        drive_meta = self._drive_service.files().get(fileId=doc_id, fields=DRIVE_VERSION_FIELDS).execute()
+        version = version_token(drive_meta)
+        cached = self._doc_cache.get(doc_id, version)
+        if cached is not None:
+            return cached[1]
+
+        doc = self._docs_service.documents().get(documentId=doc_id, fields=DOCUMENT_TEXT_FIELDS).execute()
+        text = extract_document_text(doc)
+        self._doc_cache.put(doc_id, version, doc.get("title", drive_meta.get("name", "")), text)
+        return text
 
+    @tool(params={"title": "Document title to search for"}, timeout_seconds=15, retries=1)
     def search_google_docs(self, title: str) -> str:
         """Search for Google Docs by title and get their IDs"""
         if not self._drive_service:
@@ -96,6 +324,7 @@ class ToolRegistryService:
         doc = files[0]
         return f"Found document: {doc['name']} (ID: {doc['id']})"
 
+    @tool(params={"title": "Document title to search for"}, retries=1)
     def read_google_doc_by_title(self, title: str) -> str:
         """Read the text content of a Google Doc by searching for its title"""
         if not self._drive_service:
@@ -113,184 +342,222 @@ class ToolRegistryService:
         content = self.read_google_doc_by_id(doc_id)
         return f"Content of '{doc_name}':\n\n{content}"
 
-    def create_github_issue(self, title: str, body: str, repo: str = "sarinali/athenahq") -> str:
-        """Create a GitHub issue"""
-        if not GITHUB_TOKEN:
-            return "GitHub token not configured"
+    def _run_batch(self, service, requests: List[Tuple[str, Any]]) -> Dict[str, Tuple[Any, Optional[Exception]]]:
+        """Execute requests in as few Google batch HTTP calls as allowed and collect (response, error) by request id"""
+        results: Dict[str, Tuple[Any, Optional[Exception]]] = {}
+
+        def callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        for start in range(0, len(requests), _BATCH_MAX_CALLS):
+            batch = service.new_batch_http_request(callback=callback)
+            for request_id, request in requests[start:start + _BATCH_MAX_CALLS]:
+                batch.add(request, request_id=request_id)
+            batch.execute(http=self._thread_http())
+        return results
+
+    def _title_search_request(self, titles: List[str]) -> HttpRequest:
+        """One Drive query matching Google Docs whose name contains any of the titles"""
+        name_clauses = " or ".join(
+            "name contains '{}'".format(title.replace("\\", "\\\\").replace("'", "\\'"))
+            for title in titles
+        )
+        return self._drive_service.files().list(
+            q=f"mimeType='{_GOOGLE_DOC_MIME_TYPE}' and trashed=false and ({name_clauses})",
+            fields=f"files({DRIVE_VERSION_FIELDS})",
+            pageSize=100,
+        )
+
+    @tool(params={"documents": "Google Doc document IDs or titles to search for"}, timeout_seconds=60, max_concurrency=2, retries=1)
+    def read_google_docs(self, documents: List[str]) -> str:
+        """Read the text content of several Google Docs in one call, given their document IDs and/or titles"""
+        if not documents:
+            return "No documents requested"
 
-        url = f"https://api.github.com/repos/{repo}/issues"
-        headers = {
-            "Authorization": f"token {GITHUB_TOKEN}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        data = {"title": title, "body": body}
+        if not self._drive_service:
+            self._build_services()
 
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            if response.status_code == 201:
-                issue = response.json()
-                return f"Created issue #{issue['number']}: {issue['title']}\nURL: {issue['html_url']}"
+        # Repeated entries would reuse a batch request id, which the batch rejects
+        documents = list(dict.fromkeys(documents))
+        doc_ids = [item for item in documents if _DOC_ID_PATTERN.match(item)]
+        titles = [item for item in documents if not _DOC_ID_PATTERN.match(item)]
+
+        # Each resource accessor rebuilds its methods from the discovery document (~20 ms for Docs),
+        # so the resources are fetched once rather than once per batched request
+        drive_files = self._drive_service.files()
+        docs_documents = self._docs_service.documents()
+
+        # Round trip 1: resolve every title with one Drive query and fetch version metadata for every ID
+        drive_requests: List[Tuple[str, Any]] = [
+            (f"id:{doc_id}", drive_files.get(fileId=doc_id, fields=DRIVE_VERSION_FIELDS))
+            for doc_id in doc_ids
+        ]
+        if titles:
+            drive_requests.append(("titles", self._title_search_request(titles)))
+        drive_results = self._run_batch(self._drive_service, drive_requests) if drive_requests else {}
+
+        resolved: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        # Long snake_case or kebab-case titles also look like IDs; an "ID" Drive doesn't know is retried as a title
+        misread_ids: List[str] = []
+        for doc_id in doc_ids:
+            response, exception = drive_results.get(f"id:{doc_id}", (None, None))
+            if isinstance(exception, HttpError) and exception.resp.status == 404:
+                misread_ids.append(doc_id)
+            elif exception is not None or response is None:
+                errors[doc_id] = f"Could not read document {doc_id}: {exception}"
             else:
-                return f"Failed to create issue: {response.status_code} - {response.text}"
-        except Exception as e:
-            return f"Error creating GitHub issue: {str(e)}"
+                resolved[doc_id] = response
+
+        title_matches = (drive_results.get("titles", (None, None))[0] or {}).get("files", [])
+        if misread_ids:
+            try:
+                title_matches = title_matches + self._title_search_request(misread_ids).execute().get("files", [])
+            except HttpError as e:
+                for doc_id in misread_ids:
+                    errors[doc_id] = f"Could not read document {doc_id}: {e}"
+
+        for title in titles + misread_ids:
+            if title in errors:
+                continue
+            match = next((f for f in title_matches if title.lower() in f.get("name", "").lower()), None)
+            if match is not None:
+                resolved[title] = match
+            elif title in misread_ids:
+                errors[title] = f"No Google Docs found with ID or title containing '{title}'"
+            else:
+                errors[title] = f"No Google Docs found with title containing '{title}'"
+
+        contents: Dict[str, Tuple[str, str]] = {}
+        uncached: Dict[str, Dict[str, Any]] = {}
+        for drive_file in resolved.values():
+            cached = self._doc_cache.get(drive_file["id"], version_token(drive_file))
+            if cached is not None:
+                contents[drive_file["id"]] = cached
+            else:
+                uncached[drive_file["id"]] = drive_file
+
+        # Round trip 2: fetch every body not already cached in one Docs batch
+        if uncached:
+            docs_results = self._run_batch(self._docs_service, [
+                (doc_id, docs_documents.get(documentId=doc_id, fields=DOCUMENT_TEXT_FIELDS))
+                for doc_id in uncached
+            ])
+            for doc_id, drive_file in uncached.items():
+                doc, exception = docs_results.get(doc_id, (None, None))
+                if exception is not None or doc is None:
+                    errors[doc_id] = f"Could not read document {doc_id}: {exception}"
+                    continue
+                title = doc.get("title", drive_file.get("name", ""))
+                text = extract_document_text(doc)
+                self._doc_cache.put(doc_id, version_token(drive_file), title, text)
+                contents[doc_id] = (title, text)
+
+        sections = []
+        for item in documents:
+            if item in errors:
+                sections.append(errors[item])
+                continue
+            doc_id = resolved[item]["id"]
+            if doc_id in contents:
+                title, text = contents[doc_id]
+                sections.append(f"Content of '{title}' (ID: {doc_id}):\n\n{text}")
+            else:
+                sections.append(errors.get(doc_id, f"Could not read document {doc_id}"))
+        return "\n\n---\n\n".join(sections)
+
+    @tool(
+        params={
+            "title": "Issue title",
+            "body": "Issue description",
+            "repo": "Repository (default: sarinali/athenahq)",
+        },
+        read_only=False,
+        max_concurrency=2,
+    )
+    def create_github_issue(self, title: str, body: str, repo: str = "sarinali/athenahq") -> str:
+        """Create a GitHub issue"""
+        if not self._github.configured:
+            return "GitHub token not configured"
 
-    def get_github_issues(self, repo: str = "sarinali/athenahq", state: str = "open") -> str:
+        response = self._github.post(f"/repos/{repo}/issues", json={"title": title, "body": body})
+        if response.status_code == 201:
+            issue = response.data
+            return f"Created issue #{issue['number']}: {issue['title']}\nURL: {issue['html_url']}"
+        else:
+            return f"Failed to create issue: {response.status_code} - {response.text}"
+
+    @tool(
+        params={"repo": "Repository (default: sarinali/athenahq)", "state": "Issue state"},
+        timeout_seconds=15,
+        retries=1,
+    )
+    def get_github_issues(self, repo: str = "sarinali/athenahq", state: Literal["open", "closed", "all"] = "open") -> str:
         """Get GitHub issues for a repository"""
-        if not GITHUB_TOKEN:
+        if not self._github.configured:
             return "GitHub token not configured"
 
-        url = f"https://api.github.com/repos/{repo}/issues"
-        headers = {
-            "Authorization": f"token {GITHUB_TOKEN}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        params = {"state": state}
+        response = self._github.get_issues(repo, state=state, per_page=10)
+        if response.status_code == 200:
+            issues = response.data
+            if not issues:
+                return f"No {state} issues found in {repo}"
 
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code == 200:
-                issues = response.json()
-                if not issues:
-                    return f"No {state} issues found in {repo}"
-
-                result = f"{state.title()} issues in {repo}:\n"
-                for issue in issues[:10]:
-                    result += f"#{issue['number']}: {issue['title']}\n"
-                return result
-            else:
-                return f"Failed to get issues: {response.status_code} - {response.text}"
-        except Exception as e:
-            return f"Error getting GitHub issues: {str(e)}"
+            lines = [f"{state.title()} issues in {repo}:"]
+            lines.extend(f"#{issue['number']}: {issue['title']}" for issue in issues)
+            return "\n".join(lines) + "\n"
+        if response.status_code == 429 or response.status_code >= 500:
+            # Raised rather than returned so call_function_async's retry policy applies
+            raise RuntimeError(f"GitHub returned {response.status_code}")
+        return f"Failed to get issues: {response.status_code} - {response.text}"
 
     def get_tool_schemas(self) -> List[Dict[str, Any]]:
-        """Return OpenAI-compatible tool schemas"""
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": "send_email",
-                    "description": "Send an email via Gmail",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "to": {"type": "string", "description": "Email recipient"},
-                            "subject": {"type": "string", "description": "Email subject"},
-                            "message": {"type": "string", "description": "Email message content"}
-                        },
-                        "required": ["to", "subject", "message"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "create_google_doc",
-                    "description": "Create a new Google Doc with a given title and content",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "Document title"},
-                            "content": {"type": "string", "description": "Document content"}
-                        },
-                        "required": ["title", "content"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "read_google_doc_by_id",
-                    "description": "Read the text content of a Google Doc by its documentId",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "doc_id": {"type": "string", "description": "Google Doc document ID"}
-                        },
-                        "required": ["doc_id"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "read_google_doc_by_title",
-                    "description": "Read the text content of a Google Doc by searching for its title",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "Document title to search for"}
-                        },
-                        "required": ["title"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_google_docs",
-                    "description": "Search for Google Docs by title and get their IDs",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "Document title to search for"}
-                        },
-                        "required": ["title"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "create_github_issue",
-                    "description": "Create a GitHub issue",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "Issue title"},
-                            "body": {"type": "string", "description": "Issue description"},
-                            "repo": {"type": "string", "description": "Repository (default: sarinali/athenahq)"}
-                        },
-                        "required": ["title", "body"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_github_issues",
-                    "description": "Get GitHub issues for a repository",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "repo": {"type": "string", "description": "Repository (default: sarinali/athenahq)"},
-                            "state": {"type": "string", "enum": ["open", "closed", "all"], "description": "Issue state"}
-                        },
-                        "required": []
-                    }
-                }
-            }
-        ]
-
-    def call_function(self, function_name: str, **kwargs) -> str:
-        """Call a function by name with given arguments"""
-        function_map = {
-            "send_email": self.send_gmail,
-            "create_google_doc": self.create_google_doc,
-            "read_google_doc_by_id": self.read_google_doc_by_id,
-            "read_google_doc_by_title": self.read_google_doc_by_title,
-            "search_google_docs": self.search_google_docs,
-            "create_github_issue": self.create_github_issue,
-            "get_github_issues": self.get_github_issues
-        }
-
-        if function_name not in function_map:
+        """Return OpenAI-compatible tool schemas as a fresh copy, identical on every call"""
+        return json.loads(self._tool_schemas_json)
+
+    def get_tool_spec(self, function_name: str) -> Optional[ToolSpec]:
+        entry = self._tools.get(function_name)
+        return entry[1] if entry else None
+
+    async def call_function_async(self, function_name: str, **kwargs) -> str:
+        """
+        Call a tool on the thread pool, enforcing its concurrency cap, timeout and retry policy.
+
+        Tools raise on failure so that read-only ones can be retried; only tools declared
+        read_only get retries, so a write that timed out is never sent twice. Retries go through
+        retry_service, so they back off with jitter and draw on the shared retry budget.
+        """
+        entry = self._tools.get(function_name)
+        if entry is None:
             return f"Unknown function: {function_name}"
 
+        method, spec = entry
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores[function_name]
+
+        async def attempt() -> str:
+            await semaphore.acquire()
+            try:
+                future = self._executor.submit(method, **kwargs)
+            except BaseException:
+                semaphore.release()
+                raise
+            # A timed-out call keeps running on its worker thread until the client-level timeout fires,
+            # so its slot is only released once the thread is done, not when the agent loop moves on
+            future.add_done_callback(lambda _: _release_from_thread(loop, semaphore))
+            self._metrics.track_tool_thread(function_name, future)
+            with self._metrics.tool_call(function_name):
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout=spec.timeout_seconds)
+
         try:
-            return function_map[function_name](**kwargs)
+            return await self._retry_service.run_async(
+                attempt,
+                max_attempts=spec.retries + 1,
+                is_retryable=lambda _: True,
+            )
+        except asyncio.TimeoutError:
+            return f"Error calling {function_name}: timed out after {spec.timeout_seconds:g}s"
         except Exception as e:
             return f"Error calling {function_name}: {str(e)}"
 
-
 service = ToolRegistryService()
\ No newline at end of file
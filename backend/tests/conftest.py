@@ -0,0 +1,73 @@
+import io
+import json
+import os
+from typing import Any, Dict, List
+
+# Services read their configuration at import time, so point them away from real upstreams first
+os.environ.setdefault("OPENAI_KEY", "test")
+os.environ.setdefault("GOOGLE_PREWARM", "false")
+os.environ.setdefault("GOOGLE_TOKEN_PATH", "/nonexistent/token.pickle")
+os.environ.setdefault("NUDGE_POLICY", "lazy")
+os.environ.setdefault("SESSION_STORE_BACKEND", "memory")
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+from PIL import Image
+
+from benchmarks import standin_server
+from benchmarks.standin_server import LatencyProfile
+from main import app
+from services.native_tool_calling_service import service as native_tool_calling_service
+from services.openai_inference import service as openai_service
+
+
+def make_png(color: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class StandInOpenAI:
+    """Routes the services' OpenAI clients to the in-process stand-in server and records request bodies"""
+
+    def __init__(self) -> None:
+        self.requests: List[Dict[str, Any]] = []
+        self._app_transport = httpx.ASGITransport(app=standin_server.app)
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append({"path": request.url.path, "body": json.loads(request.content)})
+        return await self._app_transport.handle_async_request(request)
+
+    def client(self) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            api_key="test",
+            base_url="http://stand-in/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(self._handle)),
+        )
+
+    @staticmethod
+    def set_latency(median_ms: float) -> None:
+        standin_server.PROFILES["openai"] = LatencyProfile(median_ms=median_ms, sigma=0.0, error_rate=0.0)
+
+
+@pytest.fixture
+def standin_openai(monkeypatch) -> StandInOpenAI:
+    monkeypatch.setitem(standin_server.PROFILES, "openai", LatencyProfile(median_ms=0, sigma=0.0, error_rate=0.0))
+    monkeypatch.setattr(standin_server, "OFF_TRACK_RATE", 0.0)
+    standin = StandInOpenAI()
+    monkeypatch.setattr(openai_service, "_async_client", standin.client())
+    monkeypatch.setattr(native_tool_calling_service, "_client", standin.client())
+    return standin
+
+
+@pytest.fixture
+def app_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://backend")
+
+
+@pytest.fixture
+def no_tools(monkeypatch):
+    # With tools offered the stand-in always calls one, which would reach the real tool upstreams
+    monkeypatch.setattr(native_tool_calling_service._tool_registry, "get_tool_schemas", lambda: [])
@@ -0,0 +1,64 @@
+import copy
+
+from services.context_manager_service import ContextWindow
+
+
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+def _tool_turn(name: str, output: str) -> list:
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [{"function": {"name": name, "arguments": "{}"}}]},
+        {"role": "tool", "content": output},
+    ]
+
+
+def test_fit_leaves_the_callers_messages_unchanged():
+    window = ContextWindow(budget_tokens=300, excerpt_chars=40, count_tokens=_count_words)
+    messages = [
+        {"role": "system", "content": "system " * 50},
+        {"role": "user", "content": "read the docs"},
+        *_tool_turn("read_google_docs", "word " * 400),
+        *_tool_turn("get_github_issues", "issue " * 100),
+    ]
+    original = copy.deepcopy(messages)
+
+    fitted = window.fit(messages)
+
+    assert messages == original
+    assert fitted[0] is messages[0]
+    assert fitted[3]["content"].startswith("word word")
+    assert "truncated earlier tool output" in fitted[3]["content"]
+    assert window.last_prompt_tokens <= 300
+
+
+def test_oversized_newest_tool_output_is_truncated_to_the_budget():
+    window = ContextWindow(budget_tokens=200, excerpt_chars=40, count_tokens=_count_words)
+    messages = [
+        {"role": "system", "content": "system " * 20},
+        {"role": "user", "content": "read the doc"},
+        *_tool_turn("read_google_doc", "word " * 5000),
+    ]
+
+    fitted = window.fit(messages)
+
+    assert window.last_prompt_tokens <= 200
+    assert "truncated to fit the context budget" in fitted[-1]["content"]
+    assert window.get_stats()["messages_truncated"] == 1
+
+
+def test_compactions_are_stable_across_iterations():
+    window = ContextWindow(budget_tokens=300, excerpt_chars=40, count_tokens=_count_words)
+    messages = [
+        {"role": "system", "content": "system " * 50},
+        {"role": "user", "content": "read the docs"},
+        *_tool_turn("read_google_docs", "word " * 400),
+        *_tool_turn("get_github_issues", "issue " * 10),
+    ]
+
+    first = window.fit(messages)
+    messages.extend(_tool_turn("search_drive", "file " * 10))
+    second = window.fit(messages)
+
+    assert second[:len(first)] == first
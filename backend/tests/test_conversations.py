@@ -0,0 +1,56 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+import services.native_tool_calling_service as native_tool_calling_module
+from services.native_tool_calling_service import service as native_tool_calling_service
+
+
+def _run_stream(prompt: str, conversation_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def collect() -> List[Dict[str, Any]]:
+        return [
+            json.loads(event[len("data: "):])
+            async for event in native_tool_calling_service.execute_with_streaming(prompt, conversation_id)
+        ]
+    return asyncio.run(collect())
+
+
+def _event(events: List[Dict[str, Any]], event_type: str) -> Dict[str, Any]:
+    return next(event for event in events if event["type"] == event_type)
+
+
+def test_responses_api_continues_from_previous_response_id(standin_openai, no_tools, monkeypatch):
+    monkeypatch.setattr(native_tool_calling_module, "TOOL_CALLING_RESPONSES_API", True)
+
+    first = _run_stream("List my open issues")
+    conversation_id = _event(first, "started")["conversation_id"]
+    first_response_id = _event(first, "context_usage")["previous_response_id"]
+    second = _run_stream("Summarize them", conversation_id)
+
+    assert _event(second, "started")["conversation_id"] == conversation_id
+    first_body, second_body = (request["body"] for request in standin_openai.requests)
+    assert "previous_response_id" not in first_body
+    assert second_body["previous_response_id"] == first_response_id
+    # The provider holds the history, so only the new prompt is sent
+    assert second_body["input"] == [{"role": "user", "content": "Summarize them"}]
+    assert _event(second, "context_usage")["previous_response_id"] != first_response_id
+
+
+def test_chat_completions_resend_stored_history(standin_openai, no_tools, monkeypatch):
+    monkeypatch.setattr(native_tool_calling_module, "TOOL_CALLING_RESPONSES_API", False)
+
+    first = asyncio.run(native_tool_calling_service.execute("List my open issues"))
+    asyncio.run(native_tool_calling_service.execute("Summarize them", first["conversation_id"]))
+
+    second_messages = standin_openai.requests[-1]["body"]["messages"]
+    assert [message["role"] for message in second_messages] == ["system", "user", "assistant", "user"]
+    assert second_messages[1]["content"] == "List my open issues"
+    assert second_messages[-1]["content"] == "Summarize them"
+
+
+def test_unknown_conversation_id_is_rejected(standin_openai, no_tools):
+    events = _run_stream("Summarize them", "0" * 32)
+
+    assert events[0]["type"] == "error"
+    assert "Unknown or expired conversation_id" in events[0]["message"]
+    assert standin_openai.requests == []
@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import time
+
+import routes.core as core_routes
+from tests.conftest import make_png
+
+LATENCY_SECONDS = 0.4
+
+
+def _post(app_client, path: str, payload: dict):
+    async def post():
+        async with app_client:
+            return await app_client.post(path, json=payload)
+    return asyncio.run(post())
+
+
+def test_ping_summarizes_the_screenshot(standin_openai, app_client):
+    image_base64 = base64.b64encode(make_png("white")).decode("ascii")
+
+    response = _post(app_client, "/core/ping", {"context": "You are helpful.", "image_base64": image_base64})
+
+    assert response.status_code == 200
+    assert response.json()["result"]
+
+
+def test_ping_rejects_invalid_base64(standin_openai, app_client):
+    response = _post(app_client, "/core/ping", {"context": "You are helpful.", "image_base64": "not*base64!"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid image encoding")
+    assert standin_openai.requests == []
+
+
+def test_concurrent_pings_overlap(standin_openai, app_client):
+    standin_openai.set_latency(LATENCY_SECONDS * 1000)
+
+    async def run_concurrently():
+        async with app_client:
+            started = time.monotonic()
+            responses = await asyncio.gather(*(
+                app_client.post("/core/ping", json={
+                    "context": "You are helpful.",
+                    "image_base64": base64.b64encode(make_png(color)).decode("ascii"),
+                })
+                for color in ("red", "green", "blue")
+            ))
+            return responses, time.monotonic() - started
+
+    responses, elapsed = asyncio.run(run_concurrently())
+
+    assert [response.status_code for response in responses] == [200] * 3
+    assert len(standin_openai.requests) == 3
+    # Serialized calls would take three upstream round trips
+    assert elapsed < LATENCY_SECONDS * 2
+
+
+def _multipart_body(image: bytes) -> bytes:
+    return (
+        b"--boundary\r\nContent-Disposition: form-data; name=\"context\"\r\n\r\nYou are helpful.\r\n"
+        b"--boundary\r\nContent-Disposition: form-data; name=\"image\"; filename=\"shot.png\"\r\n"
+        b"Content-Type: image/png\r\n\r\n" + image + b"\r\n--boundary--\r\n"
+    )
+
+
+def test_upload_over_the_limit_is_rejected_by_content_length(standin_openai, app_client, monkeypatch):
+    monkeypatch.setattr(core_routes, "_MAX_UPLOAD_BODY_BYTES", 1000)
+
+    async def post():
+        async with app_client:
+            return await app_client.post(
+                "/core/ping/upload",
+                data={"context": "You are helpful."},
+                files={"image": ("shot.png", b"\0" * 5000, "image/png")},
+            )
+
+    response = asyncio.run(post())
+
+    assert response.status_code == 413
+    assert standin_openai.requests == []
+
+
+def test_streamed_upload_over_the_limit_is_rejected(standin_openai, app_client, monkeypatch):
+    monkeypatch.setattr(core_routes, "_MAX_UPLOAD_BODY_BYTES", 1000)
+    body = _multipart_body(b"\0" * 5000)
+
+    async def chunks():
+        for start in range(0, len(body), 512):
+            yield body[start:start + 512]
+
+    async def post():
+        async with app_client:
+            return await app_client.post(
+                "/core/ping/upload",
+                content=chunks(),
+                headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+            )
+
+    response = asyncio.run(post())
+
+    assert response.status_code == 413
+    assert standin_openai.requests == []
+
+
+def test_upload_within_the_limit_is_accepted(standin_openai, app_client):
+    async def post():
+        async with app_client:
+            return await app_client.post(
+                "/core/ping/upload",
+                content=_multipart_body(make_png("white")),
+                headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+            )
+
+    response = asyncio.run(post())
+
+    assert response.status_code == 200
+
+
+def test_service_counters_are_exported_on_metrics(standin_openai, app_client):
+    async def get():
+        async with app_client:
+            await app_client.post("/core/ping", json={
+                "context": "You are helpful.",
+                "image_base64": base64.b64encode(make_png("orange")).decode("ascii"),
+            })
+            return await app_client.get("/metrics")
+
+    response = asyncio.run(get())
+
+    assert response.status_code == 200
+    assert 'component_stat{component="retry",key="",stat="operations"}' in response.text
+    assert 'component_stat{component="prompt_cache",key="ping",stat="requests"}' in response.text
+    assert 'component_stat{component="image_processing",key="",stat="images_processed"}' in response.text
+    assert 'request_stage_duration_seconds_count{endpoint="/core/ping",stage="parse"}' in response.text
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import httpx
+
+from services.github_client_service import GitHubClientService
+
+ISSUES = [
+    {"number": 1, "title": "Crash on start", "state": "open", "html_url": "https://github.test/1", "body": "..."},
+    {"number": 2, "title": "Add dark mode", "state": "open", "html_url": "https://github.test/2",
+     "pull_request": {"url": "https://github.test/pull/2"}},
+]
+ETAG = '"v1"'
+
+
+def _github_handler(seen_headers: list):
+    def handle(request: httpx.Request) -> httpx.Response:
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == ETAG:
+            return httpx.Response(304, headers={"ETag": ETAG})
+        return httpx.Response(200, content=json.dumps(ISSUES), headers={"ETag": ETAG})
+    return handle
+
+
+def _client(seen_headers: list) -> GitHubClientService:
+    client = GitHubClientService(base_url="https://github.test", token="test")
+    transport = httpx.MockTransport(_github_handler(seen_headers))
+    client._client = httpx.Client(base_url="https://github.test", transport=transport)
+    client._async_client = httpx.AsyncClient(base_url="https://github.test", transport=transport)
+    return client
+
+
+def test_unchanged_issues_are_served_from_the_etag_cache():
+    seen_headers: list = []
+    client = _client(seen_headers)
+
+    first = client.get_issues("bench/repo")
+    second = client.get_issues("bench/repo")
+
+    assert seen_headers == [None, ETAG]
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.status_code == 200
+    assert second.data == first.data == [
+        {"number": 1, "title": "Crash on start", "state": "open", "html_url": "https://github.test/1"}
+    ]
+    assert client.get_stats() == {"requests": 2, "not_modified": 1, "etag_cache_entries": 1}
+
+
+def test_async_and_sync_requests_share_the_etag_cache():
+    seen_headers: list = []
+    client = _client(seen_headers)
+
+    client.get_issues("bench/repo")
+    response = asyncio.run(client.aget_issues("bench/repo"))
+
+    assert seen_headers == [None, ETAG]
+    assert response.from_cache
+
+
+def test_different_parameters_are_cached_separately():
+    seen_headers: list = []
+    client = _client(seen_headers)
+
+    client.get_issues("bench/repo", state="open")
+    client.get_issues("bench/repo", state="closed")
+
+    assert seen_headers == [None, None]
+    assert client.get_stats()["etag_cache_entries"] == 2
@@ -0,0 +1,113 @@
+import asyncio
+from typing import List
+
+import httpx
+import pytest
+
+from services.retry_service import RetryBudget, RetryService, retry_after_seconds
+
+
+def _scripted_client(responses: List[httpx.Response]) -> httpx.AsyncClient:
+    """Answer each request with the next scripted response, repeating the last one"""
+    remaining = list(responses)
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        return remaining.pop(0) if len(remaining) > 1 else remaining[0]
+
+    return httpx.AsyncClient(base_url="https://upstream.test", transport=httpx.MockTransport(handle))
+
+
+def _operation(client: httpx.AsyncClient, calls: List[int]):
+    async def call() -> dict:
+        calls.append(1)
+        response = await client.get("/v1/analyze")
+        response.raise_for_status()
+        return response.json()
+    return call
+
+
+def _retry_service(budget_tokens: float = 10.0) -> RetryService:
+    return RetryService(
+        max_attempts=3,
+        base_delay_seconds=0.0,
+        max_delay_seconds=0.0,
+        budget=RetryBudget(ratio=0.0, min_per_second=0.0, max_tokens=budget_tokens),
+    )
+
+
+def test_retries_injected_429_and_503_until_success():
+    retry_service = _retry_service()
+    client = _scripted_client([
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"status": "on_track"}),
+    ])
+    calls: List[int] = []
+
+    result = asyncio.run(retry_service.run_async(_operation(client, calls)))
+
+    assert result == {"status": "on_track"}
+    assert len(calls) == 3
+    stats = retry_service.get_stats()
+    assert stats["retries"] == 2
+    assert stats["succeeded_after_retry"] == 1
+
+
+def test_gives_up_after_max_attempts():
+    retry_service = _retry_service()
+    calls: List[int] = []
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(retry_service.run_async(_operation(_scripted_client([httpx.Response(503)]), calls)))
+
+    assert len(calls) == 3
+    assert retry_service.get_stats()["failed"] == 1
+
+
+def test_does_not_retry_client_errors():
+    retry_service = _retry_service()
+    calls: List[int] = []
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(retry_service.run_async(_operation(_scripted_client([httpx.Response(400)]), calls)))
+
+    assert len(calls) == 1
+
+
+def test_exhausted_budget_stops_retries():
+    retry_service = _retry_service(budget_tokens=1.0)
+    client = _scripted_client([httpx.Response(503)])
+    calls: List[int] = []
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(retry_service.run_async(_operation(client, calls)))
+
+    # One token pays for a single retry of the first operation; the second gets none
+    assert len(calls) == 3
+    assert retry_service.get_stats()["budget_exhausted"] == 2
+
+
+def test_retry_after_beyond_the_deadline_is_not_waited_out():
+    retry_service = _retry_service()
+    client = _scripted_client([httpx.Response(429, headers={"Retry-After": "30"})])
+    calls: List[int] = []
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(retry_service.run_async(_operation(client, calls), deadline_seconds=5))
+
+    assert len(calls) == 1
+    assert retry_service.get_stats()["deadline_exceeded"] == 1
+
+
+def test_retry_after_parsing():
+    def error_with(headers: dict) -> httpx.HTTPStatusError:
+        request = httpx.Request("GET", "https://upstream.test")
+        response = httpx.Response(429, headers=headers, request=request)
+        return httpx.HTTPStatusError("rate limited", request=request, response=response)
+
+    assert retry_after_seconds(error_with({"Retry-After": "2"})) == 2.0
+    assert retry_after_seconds(error_with({"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(error_with({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after_seconds(error_with({"Retry-After": "soon"})) is None
+    assert retry_after_seconds(error_with({})) is None
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+
+LATENCY_SECONDS = 0.4
+PROMPTS = ("List my open issues", "Summarize my inbox", "Draft a status update")
+
+
+@pytest.mark.parametrize("path", ["/tool-calling/execute", "/tool-calling/execute-stream"])
+def test_concurrent_tool_calling_requests_overlap(standin_openai, no_tools, app_client, path):
+    standin_openai.set_latency(LATENCY_SECONDS * 1000)
+
+    async def run_concurrently():
+        async with app_client:
+            started = time.monotonic()
+            responses = await asyncio.gather(*(
+                app_client.post(path, json={"prompt": prompt}) for prompt in PROMPTS
+            ))
+            return responses, time.monotonic() - started
+
+    responses, elapsed = asyncio.run(run_concurrently())
+
+    assert [response.status_code for response in responses] == [200] * 3
+    assert all('"error"' not in response.text for response in responses)
+    assert len(standin_openai.requests) == 3
+    # Serialized calls would take three upstream round trips
+    assert elapsed < LATENCY_SECONDS * 2
+
+
+def test_parse_stage_is_reported_in_server_timing(standin_openai, no_tools, app_client):
+    async def post():
+        async with app_client:
+            return await app_client.post("/tool-calling/execute", json={"prompt": "List my open issues"})
+
+    response = asyncio.run(post())
+
+    assert response.status_code == 200
+    assert "parse;dur=" in response.headers["server-timing"]
@@ -0,0 +1,46 @@
+import asyncio
+
+from services.retry_service import service as retry_service
+from services.tool_registry_service import service as tool_registry_service
+
+
+def _flaky(failures: int, calls: list):
+    def call(**kwargs) -> str:
+        calls.append(kwargs)
+        if len(calls) <= failures:
+            raise RuntimeError("GitHub returned 503")
+        return "Open issues in bench/repo:\n"
+    return call
+
+
+def test_read_only_tool_is_retried_through_the_retry_service(monkeypatch):
+    spec = tool_registry_service.get_tool_spec("get_github_issues")
+    calls: list = []
+    monkeypatch.setitem(tool_registry_service._tools, "get_github_issues", (_flaky(1, calls), spec))
+    retries_before = retry_service.get_stats()["retries"]
+
+    result = asyncio.run(tool_registry_service.call_function_async("get_github_issues", repo="bench/repo"))
+
+    assert result == "Open issues in bench/repo:\n"
+    assert len(calls) == 2
+    assert retry_service.get_stats()["retries"] == retries_before + 1
+
+
+def test_write_tool_is_not_retried(monkeypatch):
+    spec = tool_registry_service.get_tool_spec("create_github_issue")
+    calls: list = []
+    monkeypatch.setitem(tool_registry_service._tools, "create_github_issue", (_flaky(1, calls), spec))
+
+    result = asyncio.run(tool_registry_service.call_function_async("create_github_issue", title="t", body="b"))
+
+    assert result == "Error calling create_github_issue: GitHub returned 503"
+    assert len(calls) == 1
+
+
+def test_tool_schemas_cannot_be_mutated_by_callers():
+    schemas = tool_registry_service.get_tool_schemas()
+    schemas[0]["function"]["description"] = "changed"
+    schemas.pop()
+
+    assert tool_registry_service.get_tool_schemas() != schemas
+    assert tool_registry_service.get_tool_schemas() == tool_registry_service.get_tool_schemas()
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from PIL import Image
+
+from services.task_tracking_service import service as task_tracking_service
+from tests.conftest import make_png
+
+LATENCY_SECONDS = 0.4
+
+
+async def _track(intent: str, color: str) -> dict:
+    return await task_tracking_service.analyze_task_status(
+        intent=intent,
+        image_bytes=make_png(color),
+        session_id=f"session-{color}",
+    )
+
+
+def test_track_task_result(standin_openai):
+    result = asyncio.run(_track("write the quarterly report", "white"))
+
+    assert result["status"] == "on_track"
+    assert result["nudge"] is None
+    assert standin_openai.requests[0]["path"] == "/v1/chat/completions"
+
+
+def test_concurrent_track_task_calls_overlap(standin_openai):
+    standin_openai.set_latency(LATENCY_SECONDS * 1000)
+
+    async def run_concurrently():
+        started = time.monotonic()
+        results = await asyncio.gather(
+            _track("review pull requests", "red"),
+            _track("answer support email", "green"),
+            _track("plan the sprint", "blue"),
+        )
+        return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(run_concurrently())
+
+    assert [result["status"] for result in results] == ["on_track"] * 3
+    assert len(standin_openai.requests) == 3
+    # Serialized calls would take three upstream round trips
+    assert elapsed < LATENCY_SECONDS * 2
+
+
+def test_cache_miss_decodes_the_screenshot_once(standin_openai, monkeypatch):
+    opened = []
+    original_open = Image.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(1)
+        return original_open(*args, **kwargs)
+
+    monkeypatch.setattr(Image, "open", counting_open)
+    result = asyncio.run(_track("write release notes", "yellow"))
+
+    assert result["status"] == "on_track"
+    assert len(opened) == 1
+
+
+def test_cache_hits_are_recorded_in_the_intent_history(standin_openai):
+    async def track_twice():
+        first = await _track("tidy the backlog", "purple")
+        second = await _track("tidy the backlog", "purple")
+        return first, second, await task_tracking_service.get_intent_history("session-purple")
+
+    first, second, history = asyncio.run(track_twice())
+
+    assert second == first
+    assert len(standin_openai.requests) == 1
+    assert [entry["status"] for entry in history] == ["on_track", "on_track"]